@@ -0,0 +1,131 @@
+"""
+Buffer circular em memória compartilhada (um escritor, um leitor) para alimentar a GUI
+executada em outro processo.
+
+- AnelEscritor: lado do pipeline. put_nowait nunca bloqueia: se o anel estiver cheio
+  (GUI lenta ou parada) o item é descartado e contado.
+- AnelLeitor: lado da GUI. Mesma interface usada da queue.Queue (get_nowait/task_done).
+
+Não há lock: o escritor só altera o contador de escrita e o leitor só altera o de leitura.
+O escritor grava o item no slot antes de publicar o novo contador de escrita, então o leitor
+nunca lê um slot incompleto. O contador de leitura fica na memória compartilhada, então uma GUI
+reiniciada continua de onde a anterior parou.
+"""
+
+import logging
+import pickle
+import queue
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+# ----------------------------
+# Constantes
+# ----------------------------
+ANEL_CAPACIDADE = 16384     # nro de slots
+ANEL_TAMANHO_SLOT = 2048    # bytes por slot (4 bytes de tamanho + item serializado)
+CABECALHO = 64              # bytes reservados para os contadores
+DESCARTE_LOG_S = 5.0        # intervalo mínimo entre avisos de descarte
+
+# posições dos contadores (uint64) no cabeçalho
+_ESCRITA = 0
+_LEITURA = 1
+_DESCARTADOS = 2
+_CAPACIDADE = 3
+_TAMANHO_SLOT = 4
+
+log = logging.getLogger("modulo3_gui")
+
+
+class _Anel:
+    def __init__(self, shm: SharedMemory):
+        self.shm = shm
+        self.cabecalho = np.ndarray((CABECALHO // 8,), dtype=np.uint64, buffer=shm.buf)
+        self.capacidade = int(self.cabecalho[_CAPACIDADE])
+        self.tamanho_slot = int(self.cabecalho[_TAMANHO_SLOT])
+        self.dados = shm.buf[CABECALHO:CABECALHO + self.capacidade * self.tamanho_slot]
+
+    @property
+    def nome(self) -> str:
+        return self.shm.name
+
+    @property
+    def descartados(self) -> int:
+        return int(self.cabecalho[_DESCARTADOS])
+
+    def pendentes(self) -> int:
+        return int(self.cabecalho[_ESCRITA]) - int(self.cabecalho[_LEITURA])
+
+    def fechar(self):
+        # as views precisam ser liberadas antes de fechar a memória compartilhada
+        del self.cabecalho
+        self.dados.release()
+        self.shm.close()
+
+
+class AnelEscritor(_Anel):
+    def __init__(self, capacidade: int = ANEL_CAPACIDADE, tamanho_slot: int = ANEL_TAMANHO_SLOT):
+        shm = SharedMemory(create=True, size=CABECALHO + capacidade * tamanho_slot)
+        cabecalho = np.ndarray((CABECALHO // 8,), dtype=np.uint64, buffer=shm.buf)
+        cabecalho[:] = 0
+        cabecalho[_CAPACIDADE] = capacidade
+        cabecalho[_TAMANHO_SLOT] = tamanho_slot
+        del cabecalho
+        super().__init__(shm)
+        self.ultimo_aviso = 0.0
+
+    def put_nowait(self, item):
+        """
+        Serializa e publica o item. Descarta (sem bloquear) se o anel estiver cheio
+        ou se o item não couber em um slot.
+        """
+        escrita = int(self.cabecalho[_ESCRITA])
+        if escrita - int(self.cabecalho[_LEITURA]) >= self.capacidade:
+            self._descartar("anel cheio")
+            return
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        tamanho = len(payload)
+        if tamanho > self.tamanho_slot - 4:
+            self._descartar(f"item de {tamanho} bytes maior que o slot")
+            return
+        inicio = (escrita % self.capacidade) * self.tamanho_slot
+        self.dados[inicio:inicio + 4] = tamanho.to_bytes(4, "little")
+        self.dados[inicio + 4:inicio + 4 + tamanho] = payload
+        # publica o item só depois de gravado
+        self.cabecalho[_ESCRITA] = escrita + 1
+
+    put = put_nowait
+
+    def _descartar(self, motivo):
+        self.cabecalho[_DESCARTADOS] += 1
+        agora = time.monotonic()
+        if agora - self.ultimo_aviso >= DESCARTE_LOG_S:
+            self.ultimo_aviso = agora
+            log.warning("[ANEL] Item descartado (%s). Total descartado: %d", motivo, self.descartados)
+
+    def fechar(self):
+        super().fechar()
+        self.shm.unlink()
+
+
+class AnelLeitor(_Anel):
+    def __init__(self, nome: str):
+        super().__init__(SharedMemory(name=nome))
+
+    def get_nowait(self):
+        """
+        Retorna o próximo item ou levanta queue.Empty
+        """
+        leitura = int(self.cabecalho[_LEITURA])
+        if leitura == int(self.cabecalho[_ESCRITA]):
+            raise queue.Empty
+        inicio = (leitura % self.capacidade) * self.tamanho_slot
+        tamanho = int.from_bytes(self.dados[inicio:inicio + 4], "little")
+        item = pickle.loads(self.dados[inicio + 4:inicio + 4 + tamanho])
+        # libera o slot para o escritor só depois de desserializado
+        self.cabecalho[_LEITURA] = leitura + 1
+        return item
+
+    def task_done(self):
+        pass
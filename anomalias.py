@@ -0,0 +1,176 @@
+"""
+Detecção online de anomalias sobre o fluxo contínuo de medidas (99/1).
+
+Mantém média e variância móveis exponenciais (EWMA) por (idMU, fase, medida), atualizadas de forma
+vetorizada com NumPy sobre todas as medidas do pacote (3 fases x N medidas), em O(1) por pacote.
+Sinaliza:
+- outlier: |z| acima de z_limiar em relação à EWMA da própria série
+- desequilíbrio: diferença relativa entre a maior e a menor fase acima do limiar da medida
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+# ----------------------------
+# Constantes
+# ----------------------------
+ALFA = 0.05                 # peso da amostra nova na EWMA (~20 pacotes de memória)
+Z_LIMIAR = 6.0              # |z| acima disso => outlier
+AQUECIMENTO = 30            # nro de pacotes por MU antes de começar a sinalizar
+COOLDOWN_S = 10.0           # intervalo mínimo entre alarmes iguais (mesma MU, tipo, medida e fase)
+MAX_MUS = 256               # nro máximo de MUs acompanhadas (LRU), limita a memória
+DESEQUILIBRIO_LIMIAR = {    # (max - min) / média entre as fases
+    "tensao": 0.05,
+    "corrente": 0.5,
+}
+
+
+def _valor(medida: dict, nome: str) -> float:
+    """
+    Valor numérico da medida, ou NaN se ausente/inválido
+    """
+    try:
+        return float(medida[nome])
+    except (KeyError, TypeError, ValueError):
+        return np.nan
+
+
+class _EstadoMU:
+    """
+    Estatísticas EWMA de uma MU. Arrays de forma (nro de fases, nro de medidas).
+    """
+    __slots__ = ("media", "var", "n", "ultimo_alarme")
+
+    def __init__(self, forma):
+        self.media = np.zeros(forma)
+        self.var = np.zeros(forma)
+        self.n = np.zeros(forma, dtype=np.int64)    # amostras válidas por série
+        self.ultimo_alarme = {}
+
+
+class DetectorAnomalias:
+    def __init__(self, medidas, fases, alfa=ALFA, z_limiar=Z_LIMIAR, aquecimento=AQUECIMENTO,
+                 cooldown_s=COOLDOWN_S, max_mus=MAX_MUS, desequilibrio_limiar=DESEQUILIBRIO_LIMIAR):
+        self.medidas = tuple(medidas)
+        self.fases = tuple(fases)
+        self.indice_fase = {fase: i for i, fase in enumerate(self.fases)}
+        self.alfa = alfa
+        self.z_limiar = z_limiar
+        self.aquecimento = aquecimento
+        self.cooldown_s = cooldown_s
+        self.max_mus = max_mus
+        self.desequilibrio = [
+            (self.medidas.index(medida), medida, limiar)
+            for medida, limiar in desequilibrio_limiar.items() if medida in self.medidas
+        ]
+        self.estados = OrderedDict()
+
+    def processar(self, idMU, t: float, medidas: list[dict]) -> list[dict]:
+        """
+        Atualiza as estatísticas da MU com as medidas do pacote e retorna a lista de anomalias
+        detectadas (dicionários com idMU, tipo, medida, fase, valor, score e descricao).
+        """
+        estado = self.estados.get(idMU)
+        if estado is None:
+            estado = self.estados[idMU] = _EstadoMU((len(self.fases), len(self.medidas)))
+            if len(self.estados) > self.max_mus:
+                self.estados.popitem(last=False)
+        else:
+            self.estados.move_to_end(idMU)
+
+        x = np.full(estado.media.shape, np.nan)
+        for medida in medidas:
+            i = self.indice_fase.get(medida.get("fase"))
+            if i is None:
+                continue
+            x[i] = [_valor(medida, nome) for nome in self.medidas]
+        # medidas ausentes/inválidas (e fases ausentes) não são avaliadas nem atualizam a EWMA
+        presentes = ~np.isnan(x)
+        # a primeira amostra válida de cada série inicializa a média
+        novos = presentes & (estado.n == 0)
+        estado.media[novos] = x[novos]
+        x[~presentes] = estado.media[~presentes]
+
+        diff = x - estado.media
+        desvio = np.sqrt(estado.var)
+        # piso para séries praticamente constantes (ex.: freq), evita z infinito
+        desvio = np.maximum(desvio, 1e-3 * np.abs(estado.media) + 1e-9)
+        z = diff / desvio
+
+        anomalias = []
+        aquecidos = estado.n >= self.aquecimento
+        for i, j in zip(*np.nonzero((np.abs(z) > self.z_limiar) & aquecidos)):
+            fase, medida = self.fases[i], self.medidas[j]
+            if self._liberar(estado, t, ("outlier", medida, fase)):
+                anomalias.append({
+                    "idMU": idMU, "tipo": "outlier", "medida": medida, "fase": fase,
+                    "valor": float(x[i, j]), "score": float(z[i, j]),
+                    "descricao": f"{medida} na fase {fase} = {x[i, j]:.2f} (z = {z[i, j]:+.1f}, média {estado.media[i, j]:.2f})",
+                })
+
+        for j, medida, limiar in self.desequilibrio:
+            if not presentes[:, j].all():
+                continue
+            coluna = x[:, j]
+            media = np.abs(coluna.mean())
+            if media == 0:
+                continue
+            score = (coluna.max() - coluna.min()) / media
+            if score > limiar and self._liberar(estado, t, ("desequilibrio", medida, None)):
+                fase = self.fases[int(np.argmax(np.abs(coluna - coluna.mean())))]
+                anomalias.append({
+                    "idMU": idMU, "tipo": "desequilibrio", "medida": medida, "fase": fase,
+                    "valor": float(coluna.max() - coluna.min()), "score": float(score),
+                    "descricao": f"Desequilíbrio de {medida} entre fases de {score:.1%} (limiar {limiar:.0%}), fase {fase} mais distante",
+                })
+
+        # atualização EWMA (Welford exponencial). O desvio é limitado a z_limiar desvios
+        # para que um outlier isolado não contamine a média/variância.
+        diff = np.where(aquecidos, np.clip(diff, -self.z_limiar * desvio, self.z_limiar * desvio), diff)
+        incremento = self.alfa * diff
+        estado.media += incremento
+        estado.var = np.where(presentes, (1 - self.alfa) * (estado.var + diff * incremento), estado.var)
+        estado.n += presentes
+
+        return anomalias
+
+    def exportar_estado(self) -> dict:
+        """
+        Copia serializável (JSON) das estatísticas de todas as MUs, em ordem LRU
+        """
+        return {
+            "medidas": list(self.medidas),
+            "fases": list(self.fases),
+            "mus": [
+                [idMU, estado.media.tolist(), estado.var.tolist(), estado.n.tolist(),
+                 [[*chave, t] for chave, t in estado.ultimo_alarme.items()]]
+                for idMU, estado in self.estados.items()
+            ],
+        }
+
+    def restaurar_estado(self, dados: dict) -> bool:
+        """
+        Restaura as estatísticas exportadas por exportar_estado. Ignora (retorna False) se as
+        medidas ou fases acompanhadas mudaram.
+        """
+        if tuple(dados["medidas"]) != self.medidas or tuple(dados["fases"]) != self.fases:
+            return False
+        self.estados.clear()
+        for idMU, media, var, n, alarmes in dados["mus"][-self.max_mus:]:
+            estado = self.estados[idMU] = _EstadoMU((len(self.fases), len(self.medidas)))
+            estado.media[:] = media
+            estado.var[:] = var
+            estado.n[:] = n
+            estado.ultimo_alarme = {tuple(alarme[:-1]): alarme[-1] for alarme in alarmes}
+        return True
+
+    def _liberar(self, estado, t, chave):
+        """
+        Aplica o cooldown por chave. Retorna True se o alarme deve ser emitido.
+        """
+        ultimo = estado.ultimo_alarme.get(chave)
+        if ultimo is not None and t - ultimo < self.cooldown_s:
+            return False
+        estado.ultimo_alarme[chave] = t
+        return True
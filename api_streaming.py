@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+API de streaming local para consumidores externos (historiador SCADA, jobs de análise).
+
+Servidor (thread "api" dentro do main.py, opção --api):
+- escuta em um socket Unix ("unix:/caminho") ou TCP ("host:porta")
+- clientes enviam comandos JSON, um por linha:
+    {"cmd": "assinar", "uris": ["99/1", "200/1"], "mus": [1, 2], "ieds": ["IED_A1"]}   (campos omitidos = todos;
+    itens sem um campo filtrado só são entregues se o URI estiver listado em "uris")
+    {"cmd": "exportar", "idMU": 1, "fase": "A", "medidas": ["tensao"], "inicio": t0, "fim": t1, "formato": "npy"}
+- o servidor responde com frames: 4 bytes de tamanho (big-endian) + 1 byte de tipo + payload
+    LOTE: JSON {"descartados": n, "itens": [...]} com os itens assinados acumulados em API_LOTE_MS
+    NPY/CSV: séries exportadas (colunas t + medidas) do intervalo pedido
+    ERRO: JSON {"erro": "..."}
+
+A ingestão nunca espera pelos clientes: put_nowait descarta se a fila de entrada estiver cheia e
+cada cliente tem um buffer limitado em bytes (os lotes mais antigos são descartados e contados).
+
+Cliente de linha de comando:
+    python api_streaming.py unix:/tmp/modulo3.sock --uris 99/1 --mus 1,2
+    python api_streaming.py unix:/tmp/modulo3.sock --exportar 1 A --formato csv --saida mu1_A.csv
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import queue
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from series import SerieTemporal
+
+# ----------------------------
+# Constantes
+# ----------------------------
+API_LOTE_MS = 50                # intervalo de envio dos lotes
+API_LOTE_MAX_ITENS = 5000       # itens consumidos da entrada por lote
+API_ENTRADA_MAX = 100000        # itens aguardando o servidor
+API_CLIENTE_MAX_BYTES = 8 * 1024 * 1024  # bytes pendentes por cliente (frames compartilhados contam em cada cliente)
+
+FRAME_CABECALHO = struct.Struct(">IB")
+LOTE = 1
+NPY = 2
+CSV = 3
+ERRO = 4
+
+log = logging.getLogger("modulo3_gui")
+
+
+def criar_socket(endereco: str) -> socket.socket:
+    """
+    "unix:/caminho" => socket Unix, "host:porta" => socket TCP
+    """
+    if endereco.startswith("unix:"):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+def _endereco_socket(endereco: str):
+    if endereco.startswith("unix:"):
+        return endereco.removeprefix("unix:")
+    host, porta = endereco.rsplit(":", 1)
+    return host, int(porta)
+
+
+def frame(tipo: int, payload: bytes) -> bytes:
+    return FRAME_CABECALHO.pack(len(payload), tipo) + payload
+
+
+class _Cliente:
+    __slots__ = ("sock", "entrada", "frames", "pendentes", "enviado", "descartados", "uris", "mus", "ieds", "assinatura", "assinante")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.entrada = bytearray()
+        self.frames = deque()       # (frame, nro de descartes reportados no frame; None = não descartável)
+        self.pendentes = 0          # bytes dos frames na fila
+        self.enviado = 0            # bytes já enviados do primeiro frame
+        self.descartados = 0        # lotes descartados desde o último lote entregue
+        self.uris = self.mus = self.ieds = None
+        self.assinatura = None      # chave hashable do filtro (uris, mus, ieds)
+        self.assinante = False
+
+    def aceita(self, item: dict) -> bool:
+        """
+        Um item sem o campo filtrado (ex.: 200/1 sem idMU com filtro de MUs) só passa se o
+        seu URI foi assinado explicitamente.
+        """
+        if self.uris is not None and item["URI"] not in self.uris:
+            return False
+        explicito = self.uris is not None
+        if self.mus is not None and (item["idMU"] not in self.mus if "idMU" in item else not explicito):
+            return False
+        if self.ieds is not None and (item["idIED"] not in self.ieds if "idIED" in item else not explicito):
+            return False
+        return True
+
+    def enfileirar(self, dados: bytes, descartes: int | None = 0):
+        """
+        Enfileira o frame. Enquanto o buffer passar de API_CLIENTE_MAX_BYTES descarta os lotes
+        mais antigos que ainda não começaram a ser enviados (exportações e erros, descartes=None,
+        não são descartados).
+        """
+        self.frames.append((dados, descartes))
+        self.pendentes += len(dados)
+        i = 1 if self.enviado else 0
+        while self.pendentes > API_CLIENTE_MAX_BYTES and i < len(self.frames):
+            antigo, reportados = self.frames[i]
+            if reportados is None:
+                i += 1
+                continue
+            # os descartes que o lote reportaria passam para o próximo lote
+            self.descartados += 1 + reportados
+            self.pendentes -= len(antigo)
+            del self.frames[i]
+
+
+class ServidorStreaming:
+    def __init__(self, endereco: str, medidas, fases):
+        self.endereco = endereco
+        self.medidas = tuple(medidas)
+        self.fases = tuple(fases)
+        self.entrada = queue.Queue(maxsize=API_ENTRADA_MAX)
+        self.descartados_entrada = 0
+        self.historico = {}         # idMU -> medida -> fase -> SerieTemporal
+        self.clientes = {}
+
+        caminho = _endereco_socket(endereco)
+        if isinstance(caminho, str) and os.path.exists(caminho):
+            os.unlink(caminho)
+        self.sock = criar_socket(endereco)
+        if not isinstance(caminho, str):
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(caminho)
+        self.sock.listen(64)
+        self.sock.setblocking(False)
+        self.seletor = selectors.DefaultSelector()
+        self.seletor.register(self.sock, selectors.EVENT_READ)
+        self.thread = None
+
+    def iniciar(self, shutdown_event):
+        self.thread = threading.Thread(target=self._executar, args=(shutdown_event,), daemon=True, name="api")
+        self.thread.start()
+        log.info("[API] escutando em %s", self.endereco)
+
+    def put_nowait(self, item):
+        """
+        Chamado pela thread de processamento. Nunca bloqueia.
+        """
+        try:
+            self.entrada.put_nowait(item)
+        except queue.Full:
+            self.descartados_entrada += 1
+
+    put = put_nowait
+
+    # ----------------------------
+    # Laço do servidor
+    # ----------------------------
+    def _executar(self, shutdown_event):
+        intervalo = API_LOTE_MS / 1000
+        proximo_lote = time.monotonic() + intervalo
+        try:
+            while not shutdown_event.is_set():
+                self._atender(max(proximo_lote - time.monotonic(), 0))
+                if time.monotonic() >= proximo_lote:
+                    try:
+                        self._despachar()
+                    except Exception:
+                        log.exception("[API] Falha ao despachar lote")
+                    proximo_lote = time.monotonic() + intervalo
+        except Exception:
+            log.exception("[API] Erro no servidor de streaming")
+        finally:
+            self.fechar()
+        log.info("[API] finalizando.")
+
+    def _atender(self, timeout):
+        """
+        Trata os eventos de socket prontos (conexões, comandos e envios pendentes)
+        """
+        for chave, eventos in self.seletor.select(timeout):
+            if chave.fileobj is self.sock:
+                self._aceitar()
+                continue
+            cliente = chave.data
+            if eventos & selectors.EVENT_READ:
+                self._ler(cliente)
+            if eventos & selectors.EVENT_WRITE and cliente.sock in self.clientes:
+                self._escrever(cliente)
+
+    def _aceitar(self):
+        try:
+            sock, _ = self.sock.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        cliente = _Cliente(sock)
+        self.clientes[sock] = cliente
+        self.seletor.register(sock, selectors.EVENT_READ, cliente)
+
+    def _desconectar(self, cliente):
+        self.clientes.pop(cliente.sock, None)
+        try:
+            self.seletor.unregister(cliente.sock)
+        except (KeyError, ValueError):
+            pass
+        cliente.sock.close()
+
+    def _ler(self, cliente):
+        try:
+            dados = cliente.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            dados = b""
+        if not dados:
+            self._desconectar(cliente)
+            return
+        cliente.entrada += dados
+        while (fim := cliente.entrada.find(b"\n")) >= 0:
+            linha = bytes(cliente.entrada[:fim])
+            del cliente.entrada[:fim + 1]
+            if linha.strip():
+                self._comando(cliente, linha)
+
+    def _escrever(self, cliente):
+        while cliente.frames:
+            dados = cliente.frames[0][0]
+            try:
+                n = cliente.sock.send(memoryview(dados)[cliente.enviado:])
+            except BlockingIOError:
+                return
+            except OSError:
+                self._desconectar(cliente)
+                return
+            cliente.enviado += n
+            if cliente.enviado < len(dados):
+                return
+            cliente.frames.popleft()
+            cliente.pendentes -= len(dados)
+            cliente.enviado = 0
+        self.seletor.modify(cliente.sock, selectors.EVENT_READ, cliente)
+
+    def _enviar(self, cliente, dados, descartes=0):
+        vazio = not cliente.frames
+        cliente.enfileirar(dados, descartes)
+        if vazio:
+            self.seletor.modify(cliente.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, cliente)
+
+    # ----------------------------
+    # Comandos
+    # ----------------------------
+    def _comando(self, cliente, linha):
+        try:
+            comando = json.loads(linha)
+            match comando.get("cmd"):
+                case "assinar":
+                    cliente.uris = frozenset(comando["uris"]) if comando.get("uris") else None
+                    cliente.mus = frozenset(comando["mus"]) if comando.get("mus") else None
+                    cliente.ieds = frozenset(comando["ieds"]) if comando.get("ieds") else None
+                    cliente.assinatura = (cliente.uris, cliente.mus, cliente.ieds)
+                    cliente.assinante = True
+                case "cancelar":
+                    cliente.assinante = False
+                case "exportar":
+                    self._enviar(cliente, self._exportar(comando), descartes=None)
+                case _:
+                    raise ValueError(f"comando desconhecido: {comando.get('cmd')}")
+        except Exception as e:
+            self._enviar(cliente, frame(ERRO, json.dumps({"erro": str(e)}).encode("utf-8")), descartes=None)
+
+    def _exportar(self, comando) -> bytes:
+        """
+        Exporta as medidas de uma (MU, fase) entre inicio e fim (timestamps POSIX) como .npy ou CSV.
+        Colunas: t, medidas...
+        """
+        series_mu = self.historico.get(comando["idMU"])
+        if series_mu is None:
+            raise ValueError(f"MU {comando['idMU']} sem histórico")
+        fase = comando.get("fase", self.fases[0])
+        medidas = comando.get("medidas") or list(self.medidas)
+        # todas as medidas de uma fase recebem pontos juntos, então compartilham os timestamps
+        t, _ = series_mu[medidas[0]][fase].arrays()
+        selecao = (t >= comando.get("inicio", -np.inf)) & (t <= comando.get("fim", np.inf))
+        colunas = [t[selecao]] + [series_mu[medida][fase].arrays()[1][selecao] for medida in medidas]
+        arr = np.column_stack(colunas)
+
+        buf = io.BytesIO()
+        if comando.get("formato", "npy") == "csv":
+            np.savetxt(buf, arr, delimiter=",", header=",".join(["t", *medidas]), comments="", fmt="%.6f")
+            return frame(CSV, buf.getvalue())
+        np.save(buf, arr)
+        return frame(NPY, buf.getvalue())
+
+    # ----------------------------
+    # Lotes
+    # ----------------------------
+    def _despachar(self):
+        itens = []
+        try:
+            for _ in range(API_LOTE_MAX_ITENS):
+                itens.append(self.entrada.get_nowait())
+        except queue.Empty:
+            pass
+        if not itens:
+            return
+
+        # cada item é codificado uma vez e reaproveitado em todos os lotes
+        codificados = []
+        for item in itens:
+            atributos = vars(item)
+            try:
+                codificado = json.dumps(atributos, separators=(",", ":")).encode("utf-8")
+                if "medidas" in atributos and "idMU" in atributos:
+                    self._registrar(atributos)
+            except Exception as e:
+                # um item malformado é descartado sem derrubar o servidor
+                log.warning("[API] Item descartado (URI=%s): %s", atributos.get("URI"), e)
+                continue
+            codificados.append((atributos, codificado))
+
+        # clientes com a mesma assinatura (e sem descartes a reportar) compartilham o mesmo frame
+        frames = {}
+        for cliente in list(self.clientes.values()):
+            if not cliente.assinante:
+                continue
+            chave = (cliente.assinatura, cliente.descartados)
+            dados = frames.get(chave)
+            if dados is None:
+                selecionados = [codificado for atributos, codificado in codificados if cliente.aceita(atributos)]
+                if selecionados:
+                    lote = b'{"descartados":%d,"itens":[%s]}' % (cliente.descartados, b",".join(selecionados))
+                    dados = frame(LOTE, lote)
+                frames[chave] = dados
+            if dados is None:
+                continue
+            descartes, cliente.descartados = cliente.descartados, 0
+            self._enviar(cliente, dados, descartes)
+
+    def _registrar(self, atributos):
+        """
+        Guarda as medidas no histórico usado pela exportação.
+        Fases desconhecidas e valores ausentes/inválidos são ignorados.
+        """
+        series_mu = self.historico.get(atributos["idMU"])
+        if series_mu is None:
+            series_mu = self.historico[atributos["idMU"]] = {
+                medida: {fase: SerieTemporal() for fase in self.fases} for medida in self.medidas
+            }
+        t = datetime.fromisoformat(atributos["timestamp"]).timestamp()
+        for medida in atributos["medidas"]:
+            fase = medida.get("fase")
+            if fase not in self.fases:
+                continue
+            for nome in self.medidas:
+                try:
+                    valor = float(medida[nome])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                series_mu[nome][fase].append(t, valor)
+
+    def fechar(self):
+        for cliente in list(self.clientes.values()):
+            self._desconectar(cliente)
+        try:
+            self.seletor.unregister(self.sock)
+        except (KeyError, ValueError):
+            pass
+        self.sock.close()
+        caminho = _endereco_socket(self.endereco)
+        if isinstance(caminho, str) and os.path.exists(caminho):
+            os.unlink(caminho)
+
+
+class ClienteStreaming:
+    """
+    Cliente bloqueante da API de streaming
+    """
+    def __init__(self, endereco: str, timeout: float = None):
+        self.sock = criar_socket(endereco)
+        self.sock.settimeout(timeout)
+        self.sock.connect(_endereco_socket(endereco))
+        self.arquivo = self.sock.makefile("rb")
+        self.lotes = deque()        # lotes recebidos enquanto se aguardava uma exportação
+
+    def _comando(self, **comando):
+        self.sock.sendall(json.dumps(comando).encode("utf-8") + b"\n")
+
+    def assinar(self, uris=None, mus=None, ieds=None):
+        self._comando(cmd="assinar", uris=uris, mus=mus, ieds=ieds)
+
+    def receber(self) -> tuple[int, bytes]:
+        """
+        Lê o próximo frame: (tipo, payload)
+        """
+        cabecalho = self.arquivo.read(FRAME_CABECALHO.size)
+        if len(cabecalho) < FRAME_CABECALHO.size:
+            raise ConnectionError("conexão encerrada pelo servidor")
+        tamanho, tipo = FRAME_CABECALHO.unpack(cabecalho)
+        return tipo, self.arquivo.read(tamanho)
+
+    def receber_lote(self) -> dict:
+        if self.lotes:
+            return self.lotes.popleft()
+        while True:
+            tipo, payload = self.receber()
+            if tipo == LOTE:
+                return json.loads(payload)
+            if tipo == ERRO:
+                raise RuntimeError(json.loads(payload)["erro"])
+
+    def exportar(self, idMU, fase, medidas=None, inicio=None, fim=None, formato="npy"):
+        """
+        Retorna um np.ndarray (formato "npy") ou o texto CSV (formato "csv")
+        """
+        comando = {"idMU": idMU, "fase": fase, "medidas": medidas, "formato": formato}
+        if inicio is not None:
+            comando["inicio"] = inicio
+        if fim is not None:
+            comando["fim"] = fim
+        self._comando(cmd="exportar", **comando)
+        while True:
+            tipo, payload = self.receber()
+            match tipo:
+                case 1:  # LOTE
+                    self.lotes.append(json.loads(payload))
+                case 2:  # NPY
+                    return np.load(io.BytesIO(payload))
+                case 3:  # CSV
+                    return payload.decode("utf-8")
+                case _:
+                    raise RuntimeError(json.loads(payload)["erro"])
+
+    def fechar(self):
+        self.arquivo.close()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente da API de streaming do Módulo 3")
+    parser.add_argument("endereco", help='"unix:/caminho" ou "host:porta"')
+    parser.add_argument("--uris", type=lambda v: v.split(","), default=None, help="URIs assinados, separados por vírgula")
+    parser.add_argument("--mus", type=lambda v: [int(x) for x in v.split(",")], default=None, help="idMUs assinados, separados por vírgula")
+    parser.add_argument("--ieds", type=lambda v: v.split(","), default=None, help="idIEDs assinados, separados por vírgula")
+    parser.add_argument("--exportar", nargs=2, metavar=("IDMU", "FASE"), help="exporta as medidas de uma MU/fase e sai")
+    parser.add_argument("--inicio", type=float, default=None, help="timestamp POSIX inicial da exportação")
+    parser.add_argument("--fim", type=float, default=None, help="timestamp POSIX final da exportação")
+    parser.add_argument("--formato", choices=["npy", "csv"], default="npy")
+    parser.add_argument("--saida", default=None, help="arquivo de saída da exportação")
+    args = parser.parse_args()
+
+    cliente = ClienteStreaming(args.endereco)
+    try:
+        if args.exportar:
+            dados = cliente.exportar(int(args.exportar[0]), args.exportar[1], inicio=args.inicio, fim=args.fim, formato=args.formato)
+            if args.formato == "npy":
+                np.save(args.saida or f"MU_{args.exportar[0]}_{args.exportar[1]}.npy", dados)
+            elif args.saida:
+                with open(args.saida, "w") as f:
+                    f.write(dados)
+            else:
+                print(dados, end="")
+            return
+
+        cliente.assinar(args.uris, args.mus, args.ieds)
+        while True:
+            lote = cliente.receber_lote()
+            for item in lote["itens"]:
+                print(json.dumps(item))
+            if lote["descartados"]:
+                print(f"# {lote['descartados']} lote(s) descartado(s) por lentidão do cliente")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cliente.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks dos caminhos críticos do main.py.
+
+Roda sem display (matplotlib com backend Agg, sem Tk) usando pacotes sintéticos gerados pelos
+módulos de simulação (modulo1/2/4/5). Para cada benchmark reporta ops/s e memória alocada por
+operação (tracemalloc) e compara com a baseline salva em benchmark_baseline.json.
+
+Uso:
+    python benchmark.py                      # roda e compara com a baseline
+    python benchmark.py --salvar-baseline    # roda e grava a baseline
+    python benchmark.py --filtro redraw      # roda apenas benchmarks cujo nome contém "redraw"
+
+Sai com código 1 se algum benchmark ficar mais lento que a baseline além da tolerância ou
+exceder o seu orçamento de tempo por operação (redraws do gráfico). Para filtrar o ruído da
+máquina cada benchmark reporta o melhor de LOTES lotes, e um benchmark que parece ter regredido
+é medido de novo (REMEDICOES vezes) antes de ser acusado.
+"""
+
+import os
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+import gc
+import itertools
+import json
+import random
+import shutil
+import statistics
+import string
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import api_streaming
+import main
+import modulo1
+import modulo2
+import modulo4
+import modulo5
+
+# ----------------------------
+# Constantes
+# ----------------------------
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+TOLERANCIA = 0.30           # queda relativa de ops/s tolerada antes de acusar regressão
+TOLERANCIA_RUIDOSO = 0.50   # idem para benchmarks com variação maior entre execuções (numpy escalar, matplotlib, API)
+LOTE_MIN_S = 0.3            # duração mínima de cada lote cronometrado
+LOTES = 7                   # nro de lotes por benchmark (é reportado o melhor)
+REMEDICOES = 2              # novas medições de um benchmark suspeito de regressão (e ao salvar a baseline)
+AMOSTRAS_MEMORIA = 50       # nro máximo de operações medidas com tracemalloc
+SEED = 3333
+ORCAMENTO_REDRAW_UNICA_MS = 100       # tempo máximo de redraw + renderização da série única
+ORCAMENTO_REDRAW_COMPARACAO_MS = 150  # tempo máximo de redraw + renderização da comparação (36+ séries)
+API_CLIENTES = 32           # clientes concorrentes no benchmark da API de streaming
+API_ITENS_LOTE = 100        # pacotes publicados por operação no benchmark da API
+
+BENCHMARKS = []
+LIMPEZAS = []               # recursos abertos pela preparação do benchmark em medição (sockets, temporários)
+
+
+def benchmark(nome, orcamento_ms=None, tolerancia=None):
+    """
+    Registra uma função de preparação de benchmark. A função recebe nada e retorna
+    o callable (sem argumentos) que executa UMA operação.
+    orcamento_ms: tempo máximo por operação; acima dele o benchmark falha mesmo sem baseline.
+    tolerancia: queda relativa tolerada para este benchmark (padrão: --tolerancia).
+    Recursos que precisam ser liberados após a medição são registrados em LIMPEZAS pela preparação.
+    """
+    def registrar(preparar):
+        BENCHMARKS.append((nome, preparar, orcamento_ms, tolerancia))
+        return preparar
+    return registrar
+
+# ----------------------------
+# Dados sintéticos
+# ----------------------------
+def id_ied():
+    return f"IED_{random.choice(string.ascii_uppercase)}{random.randint(0, 11)}"
+
+
+def pacotes_sinteticos(n):
+    """
+    Gera n pacotes com a mesma proporção aproximada que a simulação completa produz
+    (predominância de 99/1).
+    """
+    pacotes = []
+    for numPct in range(1, n + 1):
+        r = random.random()
+        if r < 0.85:
+            pacotes.append(modulo1.gerar_pacote_99_1(random.randint(0, 11), id_ied(), numPct))
+        elif r < 0.90:
+            pacotes.append(modulo1.gerar_pacote_99_2(random.randint(0, 11), id_ied(), numPct))
+        elif r < 0.94:
+            pacotes.append(modulo2.gerar_evento_inicio(id_ied(), random.choice(["50", "51"]), numPct))
+        elif r < 0.97:
+            pacotes.append(modulo2.gerar_evento_fim(id_ied(), random.choice(["50", "51"]), numPct))
+        elif r < 0.99:
+            pacotes.append(modulo4.gerar_evento_acumulado(id_ied(), numPct))
+        else:
+            pacotes.append(modulo5.gerar_evento_cep(random.choice(modulo5.cidades), numPct))
+    return pacotes
+
+
+def alarmes_sinteticos(n):
+    """
+    Gera n pacotes de alarme/evento (200/1, 200/2, 400/1 e CEP/Alarm)
+    """
+    geradores = [
+        lambda numPct: modulo2.gerar_evento_inicio(id_ied(), random.choice(["50", "51"]), numPct),
+        lambda numPct: modulo2.gerar_evento_fim(id_ied(), random.choice(["50", "51"]), numPct),
+        lambda numPct: modulo4.gerar_evento_acumulado(id_ied(), numPct),
+        lambda numPct: modulo5.gerar_evento_cep(random.choice(modulo5.cidades), numPct),
+    ]
+    return [random.choice(geradores)(numPct) for numPct in range(1, n + 1)]
+
+
+class _Var:
+    """
+    Substituto de tk.StringVar/BooleanVar para rodar a GUI sem display
+    """
+    def __init__(self, valor):
+        self.valor = valor
+
+    def get(self):
+        return self.valor
+
+
+class _Listbox:
+    """
+    Substituto de tk.Listbox (lista de comparação) para rodar a GUI sem display
+    """
+    def __init__(self):
+        self.itens = []
+
+    def insert(self, indice, item):
+        self.itens.insert(indice, item)
+
+    def curselection(self):
+        return ()
+
+    def get(self, indice):
+        return self.itens[indice]
+
+
+def gui_headless(modo="única"):
+    """
+    Cria um Modulo3GUI sem Tk: estado real, figura real renderizada com FigureCanvasAgg
+    """
+    gui = main.Modulo3GUI.__new__(main.Modulo3GUI)
+    gui._init_estado()
+    gui.device_menu = {}
+    gui.comparacao_list = _Listbox()
+    gui.device_var = _Var("MU_0")
+    gui.fase_var = _Var("A")
+    gui.medida_var = _Var("tensao")
+    gui.modo_var = _Var(modo)
+    gui.alarm_var = _Var("todos")
+    gui.comparacao_fase_vars = {fase: _Var(True) for fase in main.FASES}
+    gui.fig = Figure(figsize=(6, 3), dpi=100)
+    gui.ax = gui.fig.add_subplot(111)
+    gui._configurar_grafico()
+    gui.canvas = FigureCanvasAgg(gui.fig)
+    return gui
+
+
+def popular_series(gui, n_mus, n_pontos):
+    for numPct in range(n_pontos):
+        for idMU in range(n_mus):
+            pkt = modulo1.gerar_pacote_99_1(idMU, id_ied(), numPct)
+            id_ = f"MU_{idMU}"
+            gui.add_medidas(id_, pkt["timestamp"], pkt["medidas"])
+            if id_ not in gui.mu_set:
+                gui._registrar_mu(id_)
+
+# ----------------------------
+# Benchmarks
+# ----------------------------
+@benchmark("recepcao_decodificar_json")
+def _():
+    proximo = itertools.cycle([json.dumps(p).encode("utf-8") for p in pacotes_sinteticos(1000)]).__next__
+
+    def op():
+        pkt = main.decodificar_pacote(proximo())
+        main.PRIORITY_MAP.get(pkt.get("URI", ""), main.PRIORITY_MAP["99/1"])
+    return op
+
+
+@benchmark("recepcao_filtro_classificar")
+def _():
+    filtro = main.FiltroIngestao(mus={0, 1, 2}, amostragem={"99/1": 4})
+    proximo = itertools.cycle([json.dumps(p).encode("utf-8") for p in pacotes_sinteticos(1000)]).__next__
+
+    def op():
+        filtro.classificar(proximo())
+    return op
+
+
+@benchmark("processamento_construir_pacote")
+def _():
+    proximo = itertools.cycle(pacotes_sinteticos(1000)).__next__
+
+    def op():
+        main.construir_pacote(proximo())
+    return op
+
+
+@benchmark("processamento_detectar_anomalias")
+def _():
+    detector = main.DetectorAnomalias(main.MEDIDAS, main.FASES)
+    proximo = itertools.cycle([main.construir_pacote(modulo1.gerar_pacote_99_1(i % 12, id_ied(), i)) for i in range(1000)]).__next__
+
+    def op():
+        main.detectar_anomalias(detector, proximo())
+    return op
+
+
+@benchmark("processamento_correlacionar_eventos")
+def _():
+    motor = main.MotorCEP()
+    eventos = [main.construir_pacote(pkt) for pkt in alarmes_sinteticos(1000)]
+    eventos += [main.construir_pacote(modulo1.gerar_pacote_99_2(random.randint(0, 11), id_ied(), i)) for i in range(100)]
+    random.shuffle(eventos)
+    proximo = itertools.cycle(eventos).__next__
+
+    def op():
+        main.correlacionar_eventos(motor, proximo())
+    return op
+
+
+@benchmark("gui_add_medidas", tolerancia=TOLERANCIA_RUIDOSO)
+def _():
+    gui = gui_headless()
+    proximo = itertools.cycle([modulo1.gerar_pacote_99_1(i % 12, id_ied(), i) for i in range(1000)]).__next__
+
+    def op():
+        pkt = proximo()
+        gui.add_medidas(f"MU_{pkt['idMU']}", pkt["timestamp"], pkt["medidas"])
+    return op
+
+
+def _redraw_plot(n_pontos, modo, n_mus):
+    def preparar():
+        gui = gui_headless(modo)
+        popular_series(gui, n_mus, n_pontos)
+
+        def op():
+            gui._redraw_plot()
+        return op
+    return preparar
+
+
+for _n in (100, 1000, 3600):
+    benchmark(f"gui_redraw_plot_unica_{_n}", ORCAMENTO_REDRAW_UNICA_MS, TOLERANCIA_RUIDOSO)(_redraw_plot(_n, "única", 1))
+for _n in (1000, 3600):
+    benchmark(f"gui_redraw_plot_comparacao_36x{_n}", ORCAMENTO_REDRAW_COMPARACAO_MS, TOLERANCIA_RUIDOSO)(_redraw_plot(_n, "comparação", 12))
+
+
+def _redraw_alarms(n_alarmes, filtro):
+    def preparar():
+        gui = gui_headless()
+        gui.alarm_var = _Var(filtro)
+        for pkt in alarmes_sinteticos(n_alarmes):
+            gui.alarms.append(gui._criar_alarme(main.construir_pacote(pkt)))
+
+        # sem display não há como criar widgets Tk: mede a seleção dos alarmes exibidos
+        def op():
+            gui._alarmes_visiveis()
+        return op
+    return preparar
+
+
+for _n in (100, 1000, 10000):
+    benchmark(f"gui_redraw_alarms_{_n}")(_redraw_alarms(_n, "todos"))
+benchmark("gui_redraw_alarms_cep_10000")(_redraw_alarms(10000, "CEP/Alarm"))
+
+@benchmark(f"api_streaming_{API_CLIENTES}_clientes", tolerancia=TOLERANCIA_RUIDOSO)
+def _():
+    """
+    Uma operação = publicar API_ITENS_LOTE pacotes e entregar o lote a API_CLIENTES clientes
+    locais (threads lendo de sockets Unix reais). O servidor é conduzido por esta thread.
+    """
+    diretorio = tempfile.mkdtemp()
+    endereco = "unix:" + os.path.join(diretorio, "api.sock")
+    servidor = api_streaming.ServidorStreaming(endereco, main.MEDIDAS, main.FASES)
+    itens = [pkt for pkt in map(main.construir_pacote, pacotes_sinteticos(1000)) if pkt is not None]
+    proximo = itertools.cycle(itens).__next__
+
+    def consumir(cliente):
+        try:
+            while True:
+                cliente.receber()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            cliente.fechar()
+
+    threads = []
+    for _ in range(API_CLIENTES):
+        cliente = api_streaming.ClienteStreaming(endereco)
+        cliente.assinar()
+        threads.append(threading.Thread(target=consumir, args=(cliente,), daemon=True))
+        threads[-1].start()
+    while sum(c.assinante for c in servidor.clientes.values()) < API_CLIENTES:
+        servidor._atender(0.01)
+
+    def limpar():
+        # desconectar os clientes encerra as threads consumidoras
+        servidor.fechar()
+        for t in threads:
+            t.join(timeout=1.0)
+        shutil.rmtree(diretorio, ignore_errors=True)
+    LIMPEZAS.append(limpar)
+
+    def op():
+        for _ in range(API_ITENS_LOTE):
+            servidor.put_nowait(proximo())
+        servidor._despachar()
+        while any(c.frames for c in servidor.clientes.values()):
+            servidor._atender(0.01)
+    return op
+
+
+# ----------------------------
+# Execução
+# ----------------------------
+def medir(op):
+    """
+    Retorna (ops/s, bytes alocados por operação no pico) de op.
+    A taxa é a do melhor lote: ruído (escalonador, GC, outros processos) só deixa um lote mais
+    lento, então o melhor lote é bem mais estável entre execuções que a mediana.
+    O GC fica desligado durante os lotes cronometrados, como no timeit.
+    """
+    op()  # aquecimento
+
+    # calibra o nro de operações por lote
+    n = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(n):
+            op()
+        duracao = time.perf_counter() - inicio
+        if duracao >= LOTE_MIN_S:
+            break
+        n = max(n * 2, int(n * 1.2 * LOTE_MIN_S / max(duracao, 1e-9)))
+
+    taxas = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(LOTES):
+            inicio = time.perf_counter()
+            for _ in range(n):
+                op()
+            taxas.append(n / (time.perf_counter() - inicio))
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    picos = []
+    for _ in range(min(AMOSTRAS_MEMORIA, n)):
+        atual, _pico = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        op()
+        picos.append(tracemalloc.get_traced_memory()[1] - atual)
+    tracemalloc.stop()
+
+    return max(taxas), statistics.median(picos)
+
+
+def medir_benchmark(preparar):
+    """
+    Prepara e mede um benchmark, liberando em seguida o que a preparação registrou em LIMPEZAS
+    """
+    random.seed(SEED)
+    try:
+        return medir(preparar())
+    finally:
+        while LIMPEZAS:
+            LIMPEZAS.pop()()
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do Módulo 3")
+    parser.add_argument("--filtro", default="", help="roda apenas benchmarks cujo nome contém o texto")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="arquivo JSON da baseline")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="queda relativa de ops/s tolerada")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    resultados = {}
+    regressoes = []
+    estouros = []
+    print(f"{'benchmark':<40} {'ops/s':>12} {'KiB/op':>10} {'baseline':>12} {'var':>8}")
+    for nome, preparar, orcamento_ms, tolerancia in BENCHMARKS:
+        if args.filtro not in nome:
+            continue
+        ops, alocado = medir_benchmark(preparar)
+        limite = -(tolerancia if tolerancia is not None else args.tolerancia)
+        ref = baseline.get(nome, {}).get("ops_s")
+        # a carga da máquina só deixa as medições mais lentas: um benchmark suspeito (regressão ou
+        # orçamento estourado) ou a baseline sendo salva é medido de novo e vale a melhor medição
+        def suspeito(ops):
+            return (ref is not None and ops / ref - 1 < limite) or (orcamento_ms is not None and 1000 / ops > orcamento_ms)
+        for _ in range(REMEDICOES):
+            if not args.salvar_baseline and not suspeito(ops):
+                break
+            ops = max(ops, medir_benchmark(preparar)[0])
+        resultados[nome] = {"ops_s": ops, "bytes_op": alocado}
+
+        linha = f"{nome:<40} {ops:>12.1f} {alocado / 1024:>10.2f}"
+        if ref is not None:
+            variacao = ops / ref - 1
+            linha += f" {ref:>12.1f} {variacao:>+8.1%}"
+            if variacao < limite:
+                linha += "  REGRESSÃO"
+                regressoes.append(nome)
+        if orcamento_ms is not None and 1000 / ops > orcamento_ms:
+            linha += f"  ACIMA DO ORÇAMENTO ({1000 / ops:.0f}ms > {orcamento_ms}ms)"
+            estouros.append(nome)
+        print(linha, flush=True)
+
+    if args.salvar_baseline:
+        baseline.update(resultados)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline salva em {args.baseline}")
+    elif regressoes:
+        print(f"{len(regressoes)} regressão(ões) além da tolerância: {', '.join(regressoes)}")
+        return 1
+    if estouros:
+        print(f"{len(estouros)} benchmark(s) acima do orçamento de tempo: {', '.join(estouros)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
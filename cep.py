@@ -0,0 +1,234 @@
+"""
+Processamento de eventos complexos (CEP) dentro do Módulo 3.
+
+Regras declarativas do tipo "≥N eventos <URI> com <filtro> vindos de fontes distintas dentro de
+<janela_s> segundos". Os eventos ficam em janelas de tempo indexadas por URI e pelos valores dos
+campos filtrados (ex.: funcaoProtecao, tipoEvento). Cada janela mantém a contagem por fonte
+(idIED/idMU), e a expiração é incremental (remove apenas os eventos que saíram da janela), então
+o custo por evento é O(log n + eventos expirados + regras da janela), independente do número total
+de regras e IEDs. Os eventos ficam em um heap por tempo: a fila de prioridade do main.py reordena
+os URIs, então eventos atrasados chegam depois de eventos mais novos e precisam expirar no tempo certo.
+O relógio do motor avança com os timestamps dos eventos, mas eventos mais de ADIANTAMENTO_MAX_S à
+frente do relógio local são rejeitados: um remetente com o relógio adiantado faria todos os eventos
+seguintes parecerem atrasados demais.
+"""
+
+import heapq
+import itertools
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+# ----------------------------
+# Constantes
+# ----------------------------
+ADIANTAMENTO_MAX_S = 5.0    # quanto um timestamp pode estar à frente do relógio local antes de ser rejeitado
+
+# ----------------------------
+# Regras
+# ----------------------------
+@dataclass
+class RegraCEP:
+    nome: str
+    uris: tuple[str, ...]                       # URIs dos eventos considerados
+    min_eventos: int                            # N
+    janela_s: float
+    filtro: dict = field(default_factory=dict)  # campo -> valor que o evento precisa ter
+    distintos: tuple[str, ...] | None = ("idIED", "idMU")   # conta fontes distintas (None = conta eventos)
+    descricao: str = ""
+
+
+# Limiares calibrados reproduzindo o tráfego normal dos simuladores (modulo1/2/4): o 99/2 chega
+# continuamente (~2/s espalhados pelas 12 MUs) e o 400/1 a cada 2-6s, então as regras só disparam
+# quando muitas fontes reportam quase ao mesmo tempo (≤1 disparo a cada ~10h de tráfego normal).
+REGRAS_PADRAO = [
+    RegraCEP(
+        nome="Trips 51 em múltiplos IEDs",
+        uris=("200/1",), filtro={"funcaoProtecao": "51"}, min_eventos=3, janela_s=10.0,
+        descricao="Proteção 51 (sobrecorrente temporizada) atuou em vários IEDs",
+    ),
+    RegraCEP(
+        nome="Trips 50 em múltiplos IEDs",
+        uris=("200/1",), filtro={"funcaoProtecao": "50"}, min_eventos=3, janela_s=10.0,
+        descricao="Proteção 50 (sobrecorrente instantânea) atuou em vários IEDs",
+    ),
+    RegraCEP(
+        nome="Discrepâncias em múltiplas MUs",
+        uris=("99/2",), min_eventos=9, janela_s=1.0,
+        descricao="Várias MUs reportaram medidas discrepantes",
+    ),
+    RegraCEP(
+        nome="Subtensão acumulada em múltiplos IEDs",
+        uris=("400/1",), filtro={"tipoEvento": "SubtensaoAcumulada"}, min_eventos=5, janela_s=10.0,
+        descricao="Subtensão acumulada reportada por vários IEDs",
+    ),
+    RegraCEP(
+        nome="Perturbação generalizada",
+        uris=("200/1", "400/1"), min_eventos=8, janela_s=10.0,
+        descricao="Trips e eventos acumulados em muitas fontes ao mesmo tempo",
+    ),
+]
+
+# ----------------------------
+# Janelas indexadas
+# ----------------------------
+class JanelaIndexada:
+    """
+    Eventos de uma chave (URI + valores do filtro) dentro de janela_s segundos,
+    com contagem por fonte mantida incrementalmente.
+    """
+    __slots__ = ("uris", "janela_s", "distintos", "eventos", "ordem", "fontes", "regras")
+
+    def __init__(self, uris, janela_s, distintos):
+        self.uris = uris
+        self.janela_s = janela_s
+        self.distintos = distintos
+        self.eventos = []           # heap de (t, ordem de chegada, fonte)
+        self.ordem = itertools.count()
+        self.fontes = Counter()
+        self.regras = []            # [regra, instante do último disparo]
+
+    def expirar(self, agora):
+        limite = agora - self.janela_s
+        eventos = self.eventos
+        fontes = self.fontes
+        while eventos and eventos[0][0] <= limite:
+            _, _, fonte = heapq.heappop(eventos)
+            fontes[fonte] -= 1
+            if fontes[fonte] == 0:
+                del fontes[fonte]
+
+    def adicionar(self, t, atributos):
+        fonte = None
+        if self.distintos is not None:
+            fonte = next((atributos[campo] for campo in self.distintos if campo in atributos), None)
+        heapq.heappush(self.eventos, (t, next(self.ordem), fonte))
+        self.fontes[fonte] += 1
+
+    def contagem(self):
+        return len(self.eventos) if self.distintos is None else len(self.fontes)
+
+
+class MotorCEP:
+    def __init__(self, regras=REGRAS_PADRAO, adiantamento_max_s=ADIANTAMENTO_MAX_S, relogio=time.time):
+        # uri -> campos do filtro -> valores do filtro -> janelas
+        self.indices = {}
+        self.agora = float("-inf")
+        self.adiantamento_max_s = adiantamento_max_s
+        self.relogio = relogio
+        self.adiantados = 0         # eventos rejeitados por timestamp à frente do relógio local
+        for regra in regras:
+            self.adicionar_regra(regra)
+
+    def adicionar_regra(self, regra: RegraCEP):
+        campos = tuple(sorted(regra.filtro))
+        valores = tuple(regra.filtro[campo] for campo in campos)
+        distintos = tuple(regra.distintos) if regra.distintos is not None else None
+        uris = frozenset(regra.uris)
+        janela = None
+        for uri in regra.uris:
+            janelas = self.indices.setdefault(uri, {}).setdefault(campos, {}).setdefault(valores, [])
+            # regras com os mesmos URIs, filtro, janela e contagem compartilham a mesma JanelaIndexada
+            if janela is None:
+                janela = next((j for j in janelas if j.uris == uris and j.janela_s == regra.janela_s and j.distintos == distintos), None)
+            if janela is None:
+                janela = JanelaIndexada(uris, regra.janela_s, distintos)
+            if janela not in janelas:
+                janelas.append(janela)
+        if not any(r is regra for r, _ in janela.regras):
+            janela.regras.append([regra, float("-inf")])
+
+    def _janelas(self):
+        """
+        Janelas distintas (várias entradas do índice podem apontar para a mesma janela)
+        """
+        vistas = {}
+        for por_campos in self.indices.values():
+            for por_valores in por_campos.values():
+                for janelas in por_valores.values():
+                    for janela in janelas:
+                        vistas.setdefault(id(janela), janela)
+        return vistas.values()
+
+    def exportar_estado(self) -> dict:
+        """
+        Copia serializável (JSON) do relógio, dos eventos de cada janela e do último disparo de
+        cada regra. As janelas são identificadas pelos nomes das suas regras.
+        """
+        def instante(t):
+            return None if t == float("-inf") else t
+        return {
+            "agora": instante(self.agora),
+            "janelas": {
+                "|".join(regra.nome for regra, _ in janela.regras): {
+                    "eventos": [[t, fonte] for t, _, fonte in sorted(janela.eventos)],
+                    "disparos": {regra.nome: instante(ultimo) for regra, ultimo in janela.regras},
+                }
+                for janela in self._janelas()
+            },
+        }
+
+    def restaurar_estado(self, dados: dict):
+        """
+        Restaura o estado exportado por exportar_estado. Janelas e regras que não existem
+        mais (regras alteradas) são ignoradas, assim como instantes à frente do relógio local.
+        """
+        limite = self.relogio() + self.adiantamento_max_s
+        def instante(t):
+            return float("-inf") if t is None or t > limite else t
+        self.agora = instante(dados["agora"])
+        for janela in self._janelas():
+            salvo = dados["janelas"].get("|".join(regra.nome for regra, _ in janela.regras))
+            if salvo is None:
+                continue
+            janela.eventos.clear()
+            janela.fontes.clear()
+            for t, fonte in salvo["eventos"]:
+                if t > limite:
+                    continue
+                janela.eventos.append((t, next(janela.ordem), fonte))
+                janela.fontes[fonte] += 1
+            for estado in janela.regras:
+                estado[1] = instante(salvo["disparos"].get(estado[0].nome))
+
+    def processar(self, uri: str, t: float, atributos: dict) -> list[dict]:
+        """
+        Insere o evento nas janelas correspondentes e retorna as regras disparadas
+        (dicionários com regra, nroEventosAssociados, fontes e descricao).
+        Uma regra dispara no máximo uma vez por janela_s.
+        """
+        por_campos = self.indices.get(uri)
+        if por_campos is None:
+            return []
+
+        # o relógio do motor é o maior timestamp visto; eventos muito atrasados são descartados, e
+        # eventos adiantados demais são rejeitados para não arrastar o relógio de todas as janelas
+        if t > self.relogio() + self.adiantamento_max_s:
+            self.adiantados += 1
+            return []
+        if t > self.agora:
+            self.agora = t
+        disparos = []
+        for campos, por_valores in por_campos.items():
+            try:
+                valores = tuple(atributos[campo] for campo in campos)
+            except KeyError:
+                continue
+            for janela in por_valores.get(valores, ()):
+                janela.expirar(self.agora)
+                if t <= self.agora - janela.janela_s:
+                    continue
+                janela.adicionar(t, atributos)
+                contagem = janela.contagem()
+                for estado in janela.regras:
+                    regra, ultimo_disparo = estado
+                    if contagem >= regra.min_eventos and self.agora - ultimo_disparo >= regra.janela_s:
+                        estado[1] = self.agora
+                        fontes = sorted(str(fonte) for fonte in janela.fontes if fonte is not None)
+                        disparos.append({
+                            "regra": regra.nome,
+                            "nroEventosAssociados": contagem,
+                            "fontes": fontes,
+                            "descricao": f"{regra.descricao} ({contagem} em {regra.janela_s:g}s: {', '.join(fontes)})",
+                        })
+        return disparos
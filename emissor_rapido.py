@@ -0,0 +1,147 @@
+"""
+Emissão em alta taxa para os módulos de simulação.
+
+Os pacotes são codificados em JSON uma única vez (pool de templates). A cada envio apenas os campos
+variáveis (numPct, timestamp e alguns valores) são sobrescritos, com largura fixa, no bytearray
+pré-alocado do template antes do sendto. Números são alinhados à direita com espaços, que são
+whitespace válido em JSON, então o pacote continua decodificável pelo main.py.
+"""
+
+import argparse
+import json
+import re
+import time
+from datetime import datetime, timezone
+
+# ----------------------------
+# Constantes
+# ----------------------------
+LARGURA_NUMPCT = 12
+LARGURA_VALOR = 9
+TIMESTAMP_FORMATO = "%Y-%m-%dT%H:%M:%S.%f+00:00"   # mesmo formato do isoformat(), sempre com microssegundos
+LARGURA_TIMESTAMP = 32
+RELATORIO_S = 1.0           # intervalo entre relatórios da taxa alcançada
+TAMANHO_POOL = 256          # nro de templates pré-codificados por módulo
+
+MARCADOR = re.compile(r'"@@(\w+)@@"')
+
+
+def campo(nome: str) -> str:
+    """
+    Marcador a ser colocado no dicionário do pacote no lugar de um valor variável
+    """
+    return f"@@{nome}@@"
+
+
+CAMPO_NUMPCT = campo("numPct")
+CAMPO_TIMESTAMP = campo("timestamp")
+
+
+class TemplatePacote:
+    """
+    Pacote JSON pré-codificado. Os campos marcados com campo() viram janelas de largura fixa
+    no buffer, identificadas por nome em self.posicoes (nome -> (inicio, fim)).
+    """
+    __slots__ = ("buffer", "posicoes")
+
+    def __init__(self, pacote: dict, larguras: dict[str, int] = None):
+        larguras = larguras or {}
+        texto = json.dumps(pacote, separators=(",", ":"))
+        partes = []
+        self.posicoes = {}
+        tamanho = 0
+        ultimo = 0
+        for m in MARCADOR.finditer(texto):
+            nome = m.group(1)
+            partes.append(texto[ultimo:m.start()].encode("utf-8"))
+            tamanho += len(partes[-1])
+            if nome == "timestamp":
+                # campo texto: mantém as aspas
+                largura = LARGURA_TIMESTAMP
+                partes.append(b'"' + b" " * largura + b'"')
+                self.posicoes[nome] = (tamanho + 1, tamanho + 1 + largura)
+            else:
+                largura = larguras.get(nome, LARGURA_NUMPCT if nome == "numPct" else LARGURA_VALOR)
+                partes.append(b" " * (largura - 1) + b"0")
+                self.posicoes[nome] = (tamanho, tamanho + largura)
+            tamanho += len(partes[-1])
+            ultimo = m.end()
+        partes.append(texto[ultimo:].encode("utf-8"))
+        self.buffer = bytearray(b"".join(partes))
+
+
+def formatar_valores(valores, largura: int = LARGURA_VALOR, casas: int = 2) -> list[bytes]:
+    """
+    Pré-formata uma lista de números com largura fixa, para serem sobrescritos nos templates
+    """
+    return [b"%*.*f" % (largura, casas, v) for v in valores]
+
+
+def emitir(sock, destino, templates: list[TemplatePacote], valores: dict[str, list[bytes]] = None,
+           taxa: float = None, rajada: int = 64, duracao: float = None):
+    """
+    Envia os templates em ciclo, em rajadas de `rajada` pacotes, limitando a `taxa` pacotes/s
+    (None = o mais rápido possível). O timestamp é gerado uma vez por rajada. Os valores são
+    sobrescritos a partir dos pools pré-formatados em `valores` (nome do campo -> lista de bytes).
+    Imprime a taxa alcançada a cada RELATORIO_S e retorna (enviados, falhas, segundos).
+    """
+    valores = valores or {}
+    n_templates = len(templates)
+    enviados = 0
+    falhas = 0
+    numPct = 0
+    i_valor = 0
+
+    inicio = time.perf_counter()
+    proximo_relatorio = inicio + RELATORIO_S
+    enviados_relatorio = 0
+    try:
+        while duracao is None or time.perf_counter() - inicio < duracao:
+            ts = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMATO).encode("ascii")
+            for _ in range(rajada):
+                template = templates[numPct % n_templates]
+                buf = template.buffer
+                numPct += 1
+                for nome, (a, b) in template.posicoes.items():
+                    if nome == "numPct":
+                        buf[a:b] = b"%*d" % (b - a, numPct)
+                    elif nome == "timestamp":
+                        buf[a:b] = ts
+                    else:
+                        pool = valores[nome]
+                        buf[a:b] = pool[i_valor % len(pool)]
+                i_valor += 1
+                try:
+                    sock.sendto(buf, destino)
+                    enviados += 1
+                except OSError:
+                    falhas += 1
+
+            agora = time.perf_counter()
+            if taxa:
+                atraso = inicio + enviados / taxa - agora
+                if atraso > 0:
+                    time.sleep(atraso)
+                    agora = time.perf_counter()
+            if agora >= proximo_relatorio:
+                print(f"Taxa alcançada: {(enviados - enviados_relatorio) / (agora - proximo_relatorio + RELATORIO_S):.0f} pacotes/s (falhas={falhas})")
+                enviados_relatorio = enviados
+                proximo_relatorio = agora + RELATORIO_S
+    except KeyboardInterrupt:
+        pass
+
+    segundos = time.perf_counter() - inicio
+    print(f"\nEnviados {enviados} pacotes em {segundos:.1f}s ({enviados / segundos:.0f} pacotes/s, falhas={falhas})")
+    return enviados, falhas, segundos
+
+
+def argumentos(descricao: str):
+    """
+    Argumentos de linha de comando comuns aos módulos de simulação
+    """
+    parser = argparse.ArgumentParser(description=descricao)
+    parser.add_argument("--alta-taxa", action="store_true", help="envia templates pré-codificados na taxa máxima/alvo")
+    parser.add_argument("--taxa", type=float, default=None, help="taxa alvo em pacotes/s (padrão: sem limite)")
+    parser.add_argument("--rajada", type=int, default=64, help="pacotes enviados por rajada")
+    parser.add_argument("--duracao", type=float, default=None, help="duração em segundos (padrão: até Ctrl+C)")
+    return parser.parse_args()
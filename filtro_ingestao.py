@@ -0,0 +1,135 @@
+"""
+Filtro de ingestão aplicado na recepção, antes de qualquer decodificação JSON.
+
+URI, idMU, idIED e numPct são extraídos do datagrama bruto com uma varredura de bytes (regex em
+bytes). Com isso a thread de recepção decide, para cada pacote:
+- DESCARTAR: URI descartado, MU/IED não monitorado, ou fora da amostragem (1 a cada N)
+- ADIAR: enfileira os bytes crus; o JSON só é decodificado na thread de processamento
+- DECODIFICAR: decodifica na recepção (comportamento original)
+
+Estatísticas (taxa de descarte e CPU de decodificação economizada) são reportadas periodicamente.
+"""
+
+import re
+from collections import Counter
+
+# ----------------------------
+# Constantes
+# ----------------------------
+DESCARTAR = "descartar"
+ADIAR = "adiar"
+DECODIFICAR = "decodificar"
+
+_URI = re.compile(rb'"URI"\s*:\s*"([^"]*)"')
+_ID_MU = re.compile(rb'"idMU"\s*:\s*(-?\d+)')
+_ID_IED = re.compile(rb'"idIED"\s*:\s*"([^"]*)"')
+_NUM_PCT = re.compile(rb'"numPct"\s*:\s*(-?\d+)')
+
+
+def _texto(regex, data):
+    m = regex.search(data)
+    return m.group(1).decode("utf-8", errors="replace") if m else None
+
+
+def _inteiro(regex, data):
+    m = regex.search(data)
+    return int(m.group(1)) if m else None
+
+
+def farejar_uri(data: bytes) -> str | None:
+    return _texto(_URI, data)
+
+
+def farejar_num_pct(data: bytes) -> int | None:
+    return _inteiro(_NUM_PCT, data)
+
+
+def farejar_id_mu(data: bytes) -> int | None:
+    return _inteiro(_ID_MU, data)
+
+
+def farejar_id_ied(data: bytes) -> str | None:
+    return _texto(_ID_IED, data)
+
+
+class FiltroIngestao:
+    def __init__(self, mus=None, ieds=None, descartar_uris=(), amostragem=None, adiar_uris=("99/1",)):
+        """
+        mus/ieds: conjuntos monitorados (None = todos). Pacotes sem o campo não são filtrados por ele.
+        descartar_uris: URIs sempre descartados.
+        amostragem: URI -> N, mantém 1 a cada N pacotes daquele URI.
+        adiar_uris: URIs cuja decodificação JSON é adiada para a thread de processamento.
+        """
+        self.mus = set(mus) if mus is not None else None
+        self.ieds = set(ieds) if ieds is not None else None
+        self.descartar_uris = set(descartar_uris)
+        self.amostragem = dict(amostragem or {})
+        if any(n < 1 for n in self.amostragem.values()):
+            raise ValueError(f"amostragem deve ser >= 1 por URI: {self.amostragem}")
+        self.adiar_uris = set(adiar_uris)
+        self.contagem_amostragem = Counter()
+
+        # estatísticas do intervalo atual
+        self.recebidos = 0
+        self.adiados = 0
+        self.descartados = Counter()    # motivo -> nro de pacotes
+        self.bytes_descartados = 0
+        # custo médio de decodificação (ns/byte), medido nos pacotes efetivamente decodificados
+        self.ns_por_byte = 0.0
+
+    def classificar(self, data: bytes):
+        """
+        Retorna (ação, URI, numPct) do datagrama. URI e numPct são None se não encontrados.
+        """
+        self.recebidos += 1
+        uri = farejar_uri(data)
+        if uri is None:
+            return DECODIFICAR, None, None
+
+        motivo = None
+        if uri in self.descartar_uris:
+            motivo = "uri"
+        elif self.mus is not None and (id_mu := farejar_id_mu(data)) is not None and id_mu not in self.mus:
+            motivo = "mu"
+        elif self.ieds is not None and (id_ied := farejar_id_ied(data)) is not None and id_ied not in self.ieds:
+            motivo = "ied"
+        elif uri in self.amostragem:
+            self.contagem_amostragem[uri] += 1
+            if (self.contagem_amostragem[uri] - 1) % self.amostragem[uri] != 0:
+                motivo = "amostragem"
+        if motivo is not None:
+            self.descartados[motivo] += 1
+            self.bytes_descartados += len(data)
+            return DESCARTAR, uri, None
+
+        num_pct = farejar_num_pct(data)
+        if uri in self.adiar_uris:
+            self.adiados += 1
+            return ADIAR, uri, num_pct
+        return DECODIFICAR, uri, num_pct
+
+    def registrar_decodificacao(self, n_bytes: int, ns: int):
+        """
+        Atualiza a estimativa do custo de decodificação com um pacote decodificado
+        """
+        if n_bytes:
+            amostra = ns / n_bytes
+            self.ns_por_byte = amostra if self.ns_por_byte == 0.0 else 0.99 * self.ns_por_byte + 0.01 * amostra
+
+    def relatorio(self, segundos: float) -> str:
+        """
+        Resume o intervalo (taxa de descarte, adiamentos e CPU economizada) e zera as estatísticas
+        """
+        descartados = sum(self.descartados.values())
+        taxa = descartados / self.recebidos if self.recebidos else 0.0
+        economia_ms = self.bytes_descartados * self.ns_por_byte / 1e6
+        motivos = ", ".join(f"{motivo}={n}" for motivo, n in sorted(self.descartados.items())) or "-"
+        texto = (
+            f"recebidos={self.recebidos} descartados={descartados} ({taxa:.1%}; {motivos}) adiados={self.adiados} "
+            f"CPU de decodificação economizada ~{economia_ms:.1f}ms em {segundos:.0f}s"
+        )
+        self.recebidos = 0
+        self.adiados = 0
+        self.descartados.clear()
+        self.bytes_descartados = 0
+        return texto
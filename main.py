@@ -4,15 +4,19 @@ Módulo 3 - Monitoramento. Versão com GUI Tkinter integrada.
 
 - Thread 0 (main): cria socket, filas, eventos, inicia threads de recepção, processamento e armazenamento
 - GUI (executada no main thread) consome queue_gui e mostra séries históricas + alarmes
+  (com --gui-processo a GUI roda em outro processo, alimentada por um anel em memória compartilhada)
 """
 
 # ----------------------------
 # Importações
 # ----------------------------
+import argparse
 import socket
 import threading
+import multiprocessing
 import queue
 import itertools
+import functools
 import time
 import json
 import logging
@@ -25,7 +29,17 @@ matplotlib.use("TkAgg")
 from dataclasses import dataclass
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import matplotlib.dates as mdates
+import numpy as np
+from series import SerieTemporal, reduzir
+from anomalias import DetectorAnomalias
+from cep import MotorCEP
+from anel_compartilhado import AnelEscritor, AnelLeitor
+import snapshot
+from filtro_ingestao import FiltroIngestao, DESCARTAR, ADIAR
+from api_streaming import ServidorStreaming
 
 # ----------------------------
 # Constantes
@@ -34,8 +48,24 @@ BIND_ADDRESS = ""
 PORT = 3333
 RECV_BUFFER = 65536
 SOCKET_TIMEOUT = 1.0
+FILTRO_RELATORIO_S = 10.0   # intervalo entre relatórios do filtro de ingestão
 LOG_LEVEL = logging.INFO
-GUI_REFRESH_MS = 500
+GUI_REFRESH_MIN_MS = 20     # intervalo de atualização da GUI sob carga
+GUI_REFRESH_MAX_MS = 500    # intervalo de atualização da GUI ociosa
+GUI_FRAME_BUDGET_MS = 15    # tempo máximo gasto consumindo queue_gui por callback
+GUI_PLOT_INTERVALO_MS = 200 # intervalo mínimo entre redraws do gráfico disparados pela fila
+GUI_PLOT_FRACAO = 0.3       # fração máxima do laço do Tk gasta redesenhando o gráfico
+GUI_REINICIO_S = 2.0        # espera antes de reiniciar o processo da GUI (--gui-processo)
+PLOT_MAX_PONTOS = 4000      # orçamento de pontos desenhados por redraw (somando todas as séries)
+PLOT_MIN_PONTOS_SERIE = 64  # nro mínimo de pontos por série, mesmo com muitas séries
+ALARMES_VISIVEIS = 20       # nro de alarmes exibidos no painel da direita
+SNAPSHOT_MAX_ALARMES = 1000 # nro de alarmes mais recentes mantidos no snapshot
+PLOT_MAX_LEGENDA = 12       # acima disso a legenda da comparação é omitida
+CEP_ORIGEM_LOCAL = "Módulo 3"  # idCidade dos alarmes CEP gerados localmente
+SEGUNDOS_POR_DIA = 86400.0  # conversão timestamp POSIX -> data do matplotlib (época 1970-01-01)
+
+MEDIDAS = ("tensao", "corrente", "potRealW", "angTensao", "potApaVA", "potReatVAr", "fatorP", "freq")
+FASES = ("A", "B", "C")
 
 # ----------------------------
 # Logging
@@ -100,6 +130,7 @@ class PktCEPAlarm():
     timestamp: datetime
     nroEventosAssociados: int
     descricao: str
+    regra: str | None = None    # preenchido quando o alarme é gerado pelo motor CEP local
     URI: str = "CEP/Alarm"
 
 @dataclass 
@@ -125,17 +156,129 @@ class Pkt4001():
     nroEventosAcumulados: int
     URI: str = "400/1"
 
+@dataclass
+class PktAnomalia():
+    """
+    Alarme gerado localmente pelo detector de anomalias (não é recebido pela rede)
+    """
+    idMU: int
+    timestamp: datetime
+    tipo: str
+    medida: str
+    fase: str
+    valor: float
+    score: float
+    descricao: str
+    URI: str = "LOCAL/Anomalia"
+
+# ----------------------------
+# Decodificação dos pacotes
+# ----------------------------
+def decodificar_pacote(data: bytes) -> dict:
+    """
+    Decodifica o datagrama UDP (JSON em UTF-8) em um dicionário
+    """
+    return json.loads(data.decode("utf-8", errors="replace"))
+
+
+def construir_pacote(pkt: dict):
+    """
+    Converte o dicionário do pacote na dataclass correspondente ao URI.
+    Retorna None para URIs desconhecidos.
+    """
+    match pkt.get("URI", "UNKNOWN"):
+        case "99/1":
+            return Pkt991(**pkt)
+        case "99/2":
+            return Pkt992(**pkt)
+        case "200/1":
+            return Pkt2001(**pkt)
+        case "200/2":
+            return Pkt2002(**pkt)
+        case "400/1":
+            return Pkt4001(**pkt)
+        case "CEP/Alarm":
+            return PktCEPAlarm(**pkt)
+        case _:
+            return None
+
+# ----------------------------
+# Estágios de processamento
+# (recebem o pacote e retornam
+# pacotes derivados)
+# ----------------------------
+def detectar_anomalias(detector: DetectorAnomalias, dados) -> list:
+    """
+    Roda o detector de anomalias sobre o fluxo contínuo de 99/1
+    """
+    if not isinstance(dados, Pkt991):
+        return []
+    t = datetime.fromisoformat(dados.timestamp).timestamp()
+    return [PktAnomalia(timestamp=dados.timestamp, **anomalia) for anomalia in detector.processar(dados.idMU, t, dados.medidas)]
+
+def correlacionar_eventos(motor: MotorCEP, dados) -> list:
+    """
+    Alimenta o motor CEP local com trips (200/1), eventos acumulados (400/1) e discrepâncias (99/2)
+    """
+    if not isinstance(dados, (Pkt2001, Pkt4001, Pkt992)):
+        return []
+    t = datetime.fromisoformat(dados.timestamp).timestamp()
+    return [
+        PktCEPAlarm(
+            idCidade=CEP_ORIGEM_LOCAL,
+            timestamp=dados.timestamp,
+            nroEventosAssociados=disparo["nroEventosAssociados"],
+            descricao=disparo["descricao"],
+            regra=disparo["regra"],
+        )
+        for disparo in motor.processar(dados.URI, t, vars(dados))
+    ]
+
+def persistir_pipeline(gravador, seq_counter, detector: DetectorAnomalias, motor: MotorCEP, sincrono=False):
+    """
+    Copia o estado do pipeline (contador de sequência, EWMA do detector e janelas CEP) e o envia
+    para gravação. Deve ser chamado na thread de processamento.
+    """
+    estado = {"seq": next(seq_counter), "detector": detector.exportar_estado(), "cep": motor.exportar_estado()}
+    if sincrono:
+        gravador.aguardar()
+        gravador.gravar({}, estado)
+    elif not gravador.enviar({}, estado):
+        log.debug("[SNAPSHOT] gravação anterior do pipeline pendente. Tentando no próximo intervalo...")
+
+
+def restaurar_pipeline(diretorio, detector: DetectorAnomalias, motor: MotorCEP):
+    """
+    Restaura o estado do pipeline gravado por persistir_pipeline. Retorna o contador de sequência.
+    """
+    estado = snapshot.carregar_pipeline(diretorio)
+    if estado is None:
+        return itertools.count(1)
+    if not detector.restaurar_estado(estado["detector"]):
+        log.warning("[SNAPSHOT] medidas/fases do detector mudaram. Estatísticas de anomalias não restauradas.")
+    motor.restaurar_estado(estado["cep"])
+    log.info("[SNAPSHOT] pipeline restaurado (seq=%d, %d MUs no detector).", estado["seq"], len(detector.estados))
+    return itertools.count(estado["seq"] + 1)
+
 # ----------------------------
 # Implementação das Threads
 # ----------------------------
-def thread_recepcao(recv_sock, priority_queue, shutdown_event, seq_counter):
+def thread_recepcao(recv_sock, priority_queue, shutdown_event, seq_counter, filtro=None):
     """
     Thread 1 - Recepção de pacotes
-    Recebe os pacotes UDP, decodifica JSON e insere na priority_queue.
+    Recebe os pacotes UDP, aplica o filtro de ingestão sobre os bytes crus (descarte, amostragem
+    ou decodificação adiada), decodifica JSON quando necessário e insere na priority_queue.
     """
     log.info("[RECV] iniciada.")
+    filtro = filtro or FiltroIngestao()
     recv_sock.settimeout(SOCKET_TIMEOUT)
+    inicio_relatorio = time.monotonic()
     while not shutdown_event.is_set():
+        agora = time.monotonic()
+        if agora - inicio_relatorio >= FILTRO_RELATORIO_S:
+            log.info("[FILTRO] %s", filtro.relatorio(agora - inicio_relatorio))
+            inicio_relatorio = agora
+
         try:
             data, addr = recv_sock.recvfrom(RECV_BUFFER)
         except socket.timeout:
@@ -145,64 +288,90 @@ def thread_recepcao(recv_sock, priority_queue, shutdown_event, seq_counter):
             time.sleep(0.5)
             continue
 
-        try:
-            raw = data.decode("utf-8", errors="replace")
-            log.debug("[RECV] pacote recebido de %s: %s", addr, raw)
-            pkt = json.loads(raw)
-        except Exception as e:
-            log.warning("[RECV] JSON inválido de %s: %s. Ignorando pacote...", addr, e)
+        log.debug("[RECV] pacote recebido de %s: %s", addr, data)
+        acao, uri, seq = filtro.classificar(data)
+        if acao == DESCARTAR:
             continue
 
-        uri = pkt.get("URI", "")
+        if acao == ADIAR:
+            # o JSON será decodificado na thread de processamento
+            pkt = data
+        else:
+            try:
+                inicio = time.perf_counter_ns()
+                pkt = decodificar_pacote(data)
+                filtro.registrar_decodificacao(len(data), time.perf_counter_ns() - inicio)
+            except Exception as e:
+                log.warning("[RECV] JSON inválido de %s: %s. Ignorando pacote...", addr, e)
+                continue
+            uri = pkt.get("URI", "")
+            seq = pkt.get("numPct")
+
         priority = PRIORITY_MAP.get(uri, PRIORITY_MAP["99/1"])
-        seq = pkt.get("numPct", next(seq_counter))
-        priority_queue.put((priority, seq, pkt))
+        if seq is None:
+            seq = next(seq_counter)
+        # o terceiro elemento desempata pacotes com mesma prioridade e numPct (evita comparar os pacotes)
+        priority_queue.put((priority, seq, next(seq_counter), pkt))
         log.debug("[RECV] novo pacote inserido na fila (URI=%s PRIO=%s SEQ=%s).", uri, priority, seq)
 
     log.info("[RECV] finalizando.")
 
 
-def thread_processamento(priority_queue, queue_gui, queue_db, shutdown_event):
+def thread_processamento(priority_queue, queue_gui, queue_db, shutdown_event, estagios=(), queue_api=None, persistir=None):
     """
     Thread 2 - Processamento
-    Consome os pacotes priority_queue, interpreta os dados e insere nas filas queue_gui e queue_db.
+    Consome os pacotes priority_queue, interpreta os dados, roda os estágios de processamento
+    e insere o pacote e os pacotes derivados nas filas queue_gui e queue_db (e queue_api, se houver).
+    persistir é chamado a cada SNAPSHOT_INTERVALO_S e no encerramento (sincrono=True), nesta
+    thread, que é a dona do estado dos estágios.
     """
     log.info("[PROC] iniciada.")
+    proximo_snapshot = time.monotonic() + snapshot.SNAPSHOT_INTERVALO_S
     while not shutdown_event.is_set():
+        if persistir is not None and time.monotonic() >= proximo_snapshot:
+            persistir()
+            proximo_snapshot = time.monotonic() + snapshot.SNAPSHOT_INTERVALO_S
+
         try:
-            priority, seq, pkt = priority_queue.get(timeout=0.5)
+            priority, seq, _, pkt = priority_queue.get(timeout=0.5)
         except queue.Empty:
             continue
 
-        uri = pkt.get("URI", "UNKNOWN")
-
-        dados = None
-
-        match uri:
-            case "99/1":
-                dados = Pkt991(**pkt)
-            case "99/2":
-                dados = Pkt992(**pkt)
-            case "200/1":
-                dados = Pkt2001(**pkt)
-            case "200/2":
-                dados = Pkt2002(**pkt)
-            case "400/1":
-                dados = Pkt4001(**pkt)
-            case "CEP/Alarm":
-                dados = PktCEPAlarm(**pkt)
-            case _:
-                log.warning("[PROC] URI inválido. Ignorando pacote...")
-                continue
-
         try:
-            queue_gui.put_nowait(dados)
-            queue_db.put_nowait(dados)
-        except queue.Full:
-            log.warning("[PROC] Fila cheia.")
+            if isinstance(pkt, bytes):
+                pkt = decodificar_pacote(pkt)
+            dados = construir_pacote(pkt)
+        except Exception as e:
+            log.warning("[PROC] Pacote inválido: %s. Ignorando pacote...", e)
+            priority_queue.task_done()
+            continue
+
+        if dados is None:
+            log.warning("[PROC] URI inválido. Ignorando pacote...")
+            priority_queue.task_done()
+            continue
+
+        # uma falha em um estágio descarta só a saída daquele estágio; o pacote segue adiante
+        derivados = []
+        for estagio in estagios:
+            try:
+                derivados.extend(estagio(dados))
+            except Exception as e:
+                log.warning("[PROC] Falha no estágio %s (URI=%s): %s", getattr(estagio, "func", estagio).__name__, dados.URI, e)
+
+        for item in (dados, *derivados):
+            try:
+                queue_gui.put_nowait(item)
+                queue_db.put_nowait(item)
+            except queue.Full:
+                log.warning("[PROC] Fila cheia.")
+            if queue_api is not None:
+                queue_api.put_nowait(item)
 
         priority_queue.task_done()
 
+    if persistir is not None:
+        persistir(sincrono=True)
     log.info("[PROC] finalizando")
 
 
@@ -233,7 +402,7 @@ def nested_dict():
 # Interface Gráfica
 # ----------------------------
 class Modulo3GUI:
-    def __init__(self, root, queue_gui, shutdown_event):
+    def __init__(self, root, queue_gui, shutdown_event, snapshot_dir=None):
         self.root = root
         self.queue_gui = queue_gui
         self.shutdown_event = shutdown_event
@@ -241,19 +410,7 @@ class Modulo3GUI:
         self.root.title("STR_MODULO3_V1 - Monitoramento")
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-        # Dados em memória
-        self.series = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        self.alarms = []
-
-        # IEDs e parâmetros para filtros
-        self.mu_set = set()
-        self.medida_set = set([
-            "tensao", "corrente", "potRealW",
-            "angTensao", "potApaVA", "potReatVAr", 
-            "potRealW", "fatorP", "freq"
-        ])
-        self.fase_set = set(["A", "B", "C"])
-        self.alarm_set = set(["todos", "200/X", "400/1", "CEP/Alarm"])
+        self._init_estado()
 
         # Containers principais
         self.left_frame = ttk.Frame(root, padding=8)
@@ -273,7 +430,33 @@ class Modulo3GUI:
 
         self._build_right_panel()
 
-        self.root.after(GUI_REFRESH_MS, self._periodic_poll)
+        # reinício a quente: restaura o último snapshot antes de começar a consumir a fila
+        self.gravador = None
+        if snapshot_dir:
+            self._restaurar_snapshot(snapshot_dir)
+            self.gravador = snapshot.GravadorSnapshot(snapshot_dir)
+            self.root.after(int(snapshot.SNAPSHOT_INTERVALO_S * 1000), self._periodic_snapshot)
+
+        self.refresh_ms = GUI_REFRESH_MAX_MS
+        self.root.after(self.refresh_ms, self._periodic_poll)
+
+    def _init_estado(self):
+        """
+        Inicializa os dados em memória e os conjuntos usados nos filtros (independente do Tk).
+        """
+        # Dados em memória
+        self.series = {}
+        self.alarms = []
+        self.mus_sujos = set()              # MUs alteradas desde o último snapshot
+        self.meta_sujo = False              # alarmes ou MUs novas desde o último snapshot
+        self.plot_pendente = False          # dados exibidos mudaram desde o último redraw
+        self.proximo_redraw = 0.0           # perf_counter a partir do qual a fila pode redesenhar
+
+        # IEDs e parâmetros para filtros
+        self.mu_set = set()
+        self.medida_set = set(MEDIDAS)
+        self.fase_set = set(FASES)
+        self.alarm_set = set(["todos", "200/X", "400/1", "CEP/Alarm", "Anomalia"])
 
     def _build_left_panel(self):
         """
@@ -297,6 +480,25 @@ class Modulo3GUI:
         self.medida_menu = ttk.Combobox(self.left_frame, textvariable=self.medida_var, values=list(self.medida_set), state="readonly")
         self.medida_menu.pack(fill="x", pady=4)
 
+        ttk.Label(self.left_frame, text="Modo").pack(anchor="w", pady=(16,0))
+        self.modo_var = tk.StringVar(value="única")
+        self.modo_var.trace_add("write", lambda *args: self._redraw_plot())
+        self.modo_menu = ttk.Combobox(self.left_frame, textvariable=self.modo_var, values=["única", "comparação"], state="readonly")
+        self.modo_menu.pack(fill="x", pady=4)
+
+        ttk.Label(self.left_frame, text="Merge Units (comparação)").pack(anchor="w", pady=(8,0))
+        self.comparacao_list = tk.Listbox(self.left_frame, selectmode="extended", exportselection=False, height=8)
+        self.comparacao_list.bind("<<ListboxSelect>>", lambda event: self._redraw_plot())
+        self.comparacao_list.pack(fill="x", pady=4)
+
+        ttk.Label(self.left_frame, text="Fases (comparação)").pack(anchor="w", pady=(8,0))
+        self.comparacao_fase_vars = {}
+        for fase in FASES:
+            var = tk.BooleanVar(value=True)
+            var.trace_add("write", lambda *args: self._redraw_plot())
+            ttk.Checkbutton(self.left_frame, text=fase, variable=var).pack(anchor="w")
+            self.comparacao_fase_vars[fase] = var
+
     def _build_center_panel(self):
         """
         Inicializa a interface do gráfico.
@@ -304,6 +506,16 @@ class Modulo3GUI:
         ttk.Label(self.center_frame, text="STR_MODULO3_V1", font=("Helvetica", 12, "bold")).pack()
         self.fig = Figure(figsize=(6,3), dpi=100)
         self.ax = self.fig.add_subplot(111)
+        self._configurar_grafico()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.center_frame)
+        self.canvas_widget = self.canvas.get_tk_widget()
+        self.canvas_widget.pack(fill="both", expand=True)
+
+    def _configurar_grafico(self):
+        """
+        Configura os eixos uma única vez e cria os artistas reaproveitados em todos os redraws:
+        a linha da série única e a LineCollection da comparação.
+        """
         self.ax.set_xlabel("tempo")
         self.ax.set_ylabel("tensao")
         self.ax.set_title("Série histórica das medidas elétricas")
@@ -311,9 +523,10 @@ class Modulo3GUI:
         self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M:%S"))  # or "%Y-%m-%d %H:%M"
         self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
         self.fig.autofmt_xdate()
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.center_frame)
-        self.canvas_widget = self.canvas.get_tk_widget()
-        self.canvas_widget.pack(fill="both", expand=True)
+        self.linha_unica, = self.ax.plot([], [], color="blue", marker="o")
+        self.colecao = LineCollection([], linewidths=1.0)
+        self.ax.add_collection(self.colecao)
+        self.legenda_chaves = ()
 
     def _build_right_panel(self):
         """
@@ -332,98 +545,243 @@ class Modulo3GUI:
 
     def _periodic_poll(self):
         """
-        Consome a queue_gui e atualiza as estruturas utilizadas para desenhar a interface (self.alarms e self.series)
+        Consome a queue_gui dentro de um orçamento de tempo (GUI_FRAME_BUDGET_MS) e atualiza as
+        estruturas utilizadas para desenhar a interface (self.alarms e self.series).
+        O intervalo até a próxima chamada se adapta à carga da fila e o tempo gasto além do
+        orçamento (redraws) é devolvido ao Tk antes da próxima chamada.
         """
-        updated_series = False
+        mus_alterados = set()
         updated_alarms = False
-        while True:
+        fila_esgotada = False
+        processados = 0
+        inicio = time.perf_counter()
+        deadline = inicio + GUI_FRAME_BUDGET_MS / 1000
+        while time.perf_counter() < deadline:
             try:
                 item = self.queue_gui.get_nowait()
             except queue.Empty:
+                fila_esgotada = True
                 break
 
-            match item:
-                case Pkt991() | Pkt992():
-                    id_ = f"MU_{item.idMU}"
-                    medidas = item.medidas
-                    ts = item.timestamp
-                    self.add_medidas(id_, ts, medidas)
-                    self.mu_set.add(id_)
-                    self.device_menu["values"] = list(self.mu_set)
-                    updated_series = True
-                case Pkt2001() | Pkt2002():
-                    alarme_evento = {
-                        "uri": item.URI,
-                        "id": f"{item.idIED}_{item.funcaoProtecao}",
-                        "title": f"[{item.URI}] {item.idIED}",
-                        "descricao": (
-                            f"[{datetime.fromisoformat(item.timestamp).strftime("%Y-%m-%d %H:%M:%S")}]\nFunção {item.funcaoProtecao} iniciada.\nMedidas:\n{item.medidas}" 
-                            if hasattr(item, "medidas") else
-                            f"[{datetime.fromisoformat(item.timestamp).strftime("%Y-%m-%d %H:%M:%S")}]\nFunção {item.funcaoProtecao} encerrada"
-                        )
-                    }
-                    self.alarms.append(alarme_evento)
-                    updated_alarms = True
-                case Pkt4001():
-                    alarme_evento = {
-                        "uri": item.URI,
-                        "id": f"{item.idIED}_{item.tipoEvento}",
-                        "title": f"[{item.URI}] {item.idIED}",
-                        "descricao": f"[{datetime.fromisoformat(item.timestamp).strftime("%Y-%m-%d %H:%M:%S")}]\nEvento {item.tipoEvento} ocorreu {item.nroEventosAcumulados}x no {item.idIED}"
-                    }
-                    self.alarms.append(alarme_evento)
-                    updated_alarms = True
-                case PktCEPAlarm():
-                    alarme_evento = {
-                        "uri": item.URI,
-                        "id": f"{item.idCidade}",
-                        "title": f"[{item.URI}] {item.idCidade}",
-                        "descricao": f"[{datetime.fromisoformat(item.timestamp).strftime("%Y-%m-%d %H:%M:%S")}]\nEvento \"{item.descricao}\" ocorreu {item.nroEventosAssociados}x em {item.idCidade}",
-                    }
-                    self.alarms.append(alarme_evento)
-                    updated_alarms = True
-                case _:
-                    log.warning("[PROC] URI inválido. Ignorando pacote...")
-                    continue
+            try:
+                match item:
+                    case Pkt991() | Pkt992():
+                        id_ = f"MU_{item.idMU}"
+                        self.add_medidas(id_, item.timestamp, item.medidas)
+                        if id_ not in self.mu_set:
+                            self._registrar_mu(id_)
+                            self.meta_sujo = True
+                        mus_alterados.add(id_)
+                    case Pkt2001() | Pkt2002() | Pkt4001() | PktCEPAlarm() | PktAnomalia():
+                        alarme_evento = self._criar_alarme(item)
+                        self.alarms.append(alarme_evento)
+                        self.meta_sujo = True
+                        updated_alarms = updated_alarms or self._alarme_visivel(alarme_evento)
+                    case _:
+                        log.warning("[GUI] Item inválido. Ignorando...")
+                        self.queue_gui.task_done()
+                        continue
+            except Exception as e:
+                # um item malformado não pode interromper o laço (o próximo poll não seria agendado)
+                log.warning("[GUI] Falha ao exibir item (URI=%s): %s", getattr(item, "URI", None), e)
+                self.queue_gui.task_done()
+                continue
 
             self.queue_gui.task_done()
+            processados += 1
 
-        if updated_series:
+        self.mus_sujos |= mus_alterados
+
+        # redesenha apenas os painéis cujos dados exibidos mudaram; o gráfico no máximo uma vez
+        # por intervalo (ver _redraw_plot), acumulando as alterações até lá
+        if not mus_alterados.isdisjoint(self._mus_exibidos()):
+            self.plot_pendente = True
+        if self.plot_pendente and inicio >= self.proximo_redraw:
             self._redraw_plot()
         if updated_alarms:
             self._redraw_alarms()
 
+        # adapta o intervalo de atualização: fila com itens pendentes => intervalo mínimo,
+        # fila vazia => intervalo dobra até GUI_REFRESH_MAX_MS
+        if not fila_esgotada:
+            self.refresh_ms = GUI_REFRESH_MIN_MS
+        elif processados == 0:
+            self.refresh_ms = min(self.refresh_ms * 2, GUI_REFRESH_MAX_MS)
+        else:
+            self.refresh_ms = max(self.refresh_ms // 2, GUI_REFRESH_MIN_MS)
+
         # schedule next poll
+        excedente_ms = (time.perf_counter() - inicio) * 1000 - GUI_FRAME_BUDGET_MS
         if not self.shutdown_event.is_set():
-            self.root.after(GUI_REFRESH_MS, self._periodic_poll)
+            self.root.after(max(self.refresh_ms, int(excedente_ms)), self._periodic_poll)
+
+    def _criar_alarme(self, item):
+        """
+        Converte um pacote de alarme/evento no dicionário exibido no painel de alarmes
+        """
+        ts = datetime.fromisoformat(item.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        match item:
+            case Pkt2001():
+                return {
+                    "uri": item.URI,
+                    "id": f"{item.idIED}_{item.funcaoProtecao}",
+                    "title": f"[{item.URI}] {item.idIED}",
+                    "descricao": f"[{ts}]\nFunção {item.funcaoProtecao} iniciada.\nMedidas:\n{item.medidas}",
+                }
+            case Pkt2002():
+                return {
+                    "uri": item.URI,
+                    "id": f"{item.idIED}_{item.funcaoProtecao}",
+                    "title": f"[{item.URI}] {item.idIED}",
+                    "descricao": f"[{ts}]\nFunção {item.funcaoProtecao} encerrada",
+                }
+            case Pkt4001():
+                return {
+                    "uri": item.URI,
+                    "id": f"{item.idIED}_{item.tipoEvento}",
+                    "title": f"[{item.URI}] {item.idIED}",
+                    "descricao": f"[{ts}]\nEvento {item.tipoEvento} ocorreu {item.nroEventosAcumulados}x no {item.idIED}",
+                }
+            case PktCEPAlarm(regra=str()):
+                return {
+                    "uri": item.URI,
+                    "id": f"{item.idCidade}_{item.regra}",
+                    "title": f"[{item.URI}] {item.regra}",
+                    "descricao": f"[{ts}]\nRegra \"{item.regra}\" disparada no {item.idCidade}:\n{item.descricao}",
+                }
+            case PktCEPAlarm():
+                return {
+                    "uri": item.URI,
+                    "id": f"{item.idCidade}",
+                    "title": f"[{item.URI}] {item.idCidade}",
+                    "descricao": f"[{ts}]\nEvento \"{item.descricao}\" ocorreu {item.nroEventosAssociados}x em {item.idCidade}",
+                }
+            case PktAnomalia():
+                return {
+                    "uri": item.URI,
+                    "id": f"MU_{item.idMU}_{item.tipo}_{item.medida}",
+                    "title": f"[Anomalia] MU_{item.idMU} {item.medida}",
+                    "descricao": f"[{ts}]\nAnomalia ({item.tipo}) detectada localmente na MU_{item.idMU}:\n{item.descricao}",
+                }
+
+    def _alarme_visivel(self, alarme):
+        """
+        Indica se o alarme passa pelo filtro selecionado no painel de alarmes
+        """
+        match self.alarm_var.get():
+            case "200/X":
+                return alarme["uri"] in ("200/1", "200/2")
+            case "400/1" | "CEP/Alarm" as uri:
+                return alarme["uri"] == uri
+            case "Anomalia":
+                return alarme["uri"] == PktAnomalia.URI
+            case _:
+                return True
+
+    def _registrar_mu(self, id_):
+        """
+        Adiciona uma MU recém-descoberta aos filtros (combobox e lista de comparação)
+        """
+        self.mu_set.add(id_)
+        mus = sorted(self.mu_set, key=lambda mu: int(mu.removeprefix("MU_")))
+        self.device_menu["values"] = mus
+        self.comparacao_list.insert(mus.index(id_), id_)
+
+    def _mus_exibidos(self):
+        """
+        Retorna o conjunto de MUs desenhadas no gráfico com os filtros atuais
+        """
+        if self.modo_var.get() != "comparação":
+            return {self.device_var.get()}
+        selecao = [self.comparacao_list.get(i) for i in self.comparacao_list.curselection()]
+        return set(selecao) if selecao else set(self.mu_set)
 
     def _redraw_plot(self):
         """
-        Desenha o gráfico
+        Desenha o gráfico (renderização síncrona, para que o custo seja medido). O próximo redraw
+        disparado pela fila só é liberado após GUI_PLOT_INTERVALO_MS ou, se o redraw for caro,
+        após o tempo que mantém o gráfico abaixo de GUI_PLOT_FRACAO do laço do Tk.
+        Os eixos não são recriados: só os dados dos artistas persistentes e os limites mudam.
         """
-        self.ax.clear()
-        self.ax.set_title("Série histórica das medidas elétricas")
-        self.ax.set_xlabel("tempo")
+        inicio = time.perf_counter()
         self.ax.set_ylabel(self.medida_var.get())
-        self.ax.grid(True)
 
-        # quais dispositivos desenhar?
-        devfilter = self.device_var.get()
-        medidafilter = self.medida_var.get()
-        fasefilter = self.fase_var.get()
+        if self.modo_var.get() == "comparação":
+            self.linha_unica.set_data([], [])
+            limites = self._desenhar_comparacao()
+        else:
+            self.colecao.set_segments([])
+            self._definir_legenda(())
+            limites = self._desenhar_serie_unica()
 
-        if devfilter != "" and devfilter is not None:
-            data = self.series.get(devfilter).get(medidafilter).get(fasefilter)
-            xs = [datetime.fromisoformat(x[0]) for x in data] 
-            ys = [x[1] for x in data]
+        # relim não considera coleções: os limites da comparação são somados à parte
+        self.ax.relim()
+        if limites is not None:
+            self.ax.update_datalim(limites)
+        self.ax.autoscale_view()
 
-            self.ax.plot(xs, ys, label=devfilter, color="blue", marker="o")
-        
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M:%S"))  # or "%Y-%m-%d %H:%M"
-        self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-        self.fig.autofmt_xdate()
+        self.canvas.draw()
 
-        self.canvas.draw_idle()
+        fim = time.perf_counter()
+        self.plot_pendente = False
+        self.proximo_redraw = fim + max(GUI_PLOT_INTERVALO_MS / 1000, (fim - inicio) * (1 / GUI_PLOT_FRACAO - 1))
+
+    def _desenhar_serie_unica(self):
+        """
+        Desenha uma série (MU, fase, medida) selecionada nos comboboxes
+        """
+        devfilter = self.device_var.get()
+        if devfilter not in self.series:
+            self.linha_unica.set_data([], [])
+            return None
+        serie = self.series[devfilter][self.medida_var.get()][self.fase_var.get()]
+        t, y = reduzir(*serie.arrays(), PLOT_MAX_PONTOS)
+        self.linha_unica.set_data(t / SEGUNDOS_POR_DIA, y)
+        return None
+
+    def _desenhar_comparacao(self):
+        """
+        Desenha todas as combinações (MU, fase) selecionadas para a medida atual na LineCollection
+        persistente. O orçamento PLOT_MAX_PONTOS é dividido entre as séries, mantendo o custo
+        do redraw aproximadamente constante independente do número de séries.
+        Retorna os cantos ((xmin, ymin), (xmax, ymax)) dos dados desenhados, ou None.
+        """
+        medida = self.medida_var.get()
+        fases = [fase for fase, var in self.comparacao_fase_vars.items() if var.get()]
+        mus = sorted((mu for mu in self._mus_exibidos() if mu in self.series), key=lambda mu: int(mu.removeprefix("MU_")))
+        chaves = tuple((mu, fase) for mu in mus for fase in fases if len(self.series[mu][medida][fase]) > 0)
+        if not chaves:
+            self.colecao.set_segments([])
+            self._definir_legenda(())
+            return None
+
+        max_pontos = max(PLOT_MAX_PONTOS // len(chaves), PLOT_MIN_PONTOS_SERIE)
+        segmentos = []
+        for mu, fase in chaves:
+            t, y = reduzir(*self.series[mu][medida][fase].arrays(), max_pontos)
+            segmentos.append(np.column_stack((t / SEGUNDOS_POR_DIA, y)))
+
+        cmap = matplotlib.colormaps["tab20"]
+        cores = cmap(np.arange(len(chaves)) % cmap.N)
+        self.colecao.set_segments(segmentos)
+        self.colecao.set_color(cores)
+        self._definir_legenda(chaves, cores)
+
+        pontos = np.concatenate(segmentos)
+        return np.nanmin(pontos, axis=0), np.nanmax(pontos, axis=0)
+
+    def _definir_legenda(self, chaves, cores=()):
+        """
+        Recria a legenda da comparação apenas quando o conjunto de séries exibidas muda
+        """
+        if chaves == self.legenda_chaves:
+            return
+        self.legenda_chaves = chaves
+        if (legenda := self.ax.get_legend()) is not None:
+            legenda.remove()
+        if chaves and len(chaves) <= PLOT_MAX_LEGENDA:
+            handles = [Line2D([], [], color=cor) for cor in cores]
+            self.ax.legend(handles, [f"{mu} {fase}" for mu, fase in chaves], fontsize="small", ncol=3)
 
     def _redraw_alarms(self):
         """
@@ -432,20 +790,7 @@ class Modulo3GUI:
         for child in self.alarm_container.winfo_children():
             child.destroy()
 
-        alarmes = []
-        alarmfilter = self.alarm_var.get()
-        match alarmfilter:
-            case "200/X":
-                alarmes = [alarme for alarme in self.alarms if alarme["uri"] == "200/1" or alarme["uri"] == "200/2"]
-            case "400/1":
-                alarmes = [alarme for alarme in self.alarms if alarme["uri"] == "400/1"]
-            case "CEP/Alarm":
-                alarmes = [alarme for alarme in self.alarms if alarme["uri"] == "CEP/Alarm"]
-            case _:
-                alarmes = self.alarms
-
-        
-        for alarm in alarmes[-20:]:
+        for alarm in self._alarmes_visiveis():
             uri = alarm["uri"]
             alarm_id = alarm["id"]
             alarm_title = alarm["title"]
@@ -459,6 +804,8 @@ class Modulo3GUI:
                 bg = "#33FF33"
             elif uri == "400/1":
                 bg = "#FF9933"
+            elif uri == PktAnomalia.URI:
+                bg = "#66CCFF"
 
             frame = tk.Frame(self.alarm_container, bg=bg, bd=1, relief="solid")
             frame.pack(fill="x", pady=3, padx=2)
@@ -469,6 +816,19 @@ class Modulo3GUI:
             btn = tk.Button(frame, text="Detalhes", command=lambda t=alarm_title, d=alarm_desc: self.show_alarm_details(t, d))
             btn.pack(side="right", padx=4)
 
+    def _alarmes_visiveis(self):
+        """
+        Retorna os últimos ALARMES_VISIVEIS alarmes que passam pelo filtro atual
+        """
+        alarmes = []
+        for alarme in reversed(self.alarms):
+            if self._alarme_visivel(alarme):
+                alarmes.append(alarme)
+                if len(alarmes) == ALARMES_VISIVEIS:
+                    break
+        alarmes.reverse()
+        return alarmes
+
     def show_alarm_details(self, alarm_title, alarm_desc):
         """
         Desenha janela pop up com detalhes do alarme
@@ -480,52 +840,184 @@ class Modulo3GUI:
         Desenha janela pop up com confirmação para fechar programa
         """
         if messagebox.askokcancel("Sair", "Deseja encerrar o Módulo 3?"):
+            if self.gravador is not None:
+                self.gravador.aguardar()
+                self.gravador.gravar(*self._coletar_snapshot())
             self.shutdown_event.set()
             self.root.quit()
 
-    def add_medidas(self, id_: str, ts: datetime, medidas: [MedidasEletricas]):
+    def _coletar_snapshot(self):
         """
-        Método auxiliar para adicionar novas medidas em self.series
+        Copia o estado a ser gravado: arrays das MUs alteradas desde o último snapshot e metadados
         """
-        if id_ not in self.series:
+        arrays = {id_: snapshot.empacotar_mu(self.series[id_], MEDIDAS, FASES) for id_ in self.mus_sujos}
+        self.mus_sujos = set()
+        self.meta_sujo = False
+        meta = {
+            "medidas": MEDIDAS,
+            "fases": FASES,
+            "mus": sorted(self.series),
+            "alarmes": self.alarms[-SNAPSHOT_MAX_ALARMES:],
+        }
+        return arrays, meta
+
+    def _periodic_snapshot(self):
+        """
+        Envia um snapshot incremental para a thread de gravação a cada SNAPSHOT_INTERVALO_S.
+        Alarmes novos são gravados mesmo sem MUs alteradas (apenas os metadados).
+        """
+        if self.mus_sujos or self.meta_sujo:
+            arrays, meta = self._coletar_snapshot()
+            # gravação anterior ainda pendente: o estado volta a ficar sujo para o próximo intervalo
+            if not self.gravador.enviar(arrays, meta):
+                self.mus_sujos |= arrays.keys()
+                self.meta_sujo = True
+
+        if not self.shutdown_event.is_set():
+            self.root.after(int(snapshot.SNAPSHOT_INTERVALO_S * 1000), self._periodic_snapshot)
+
+    def _restaurar_snapshot(self, diretorio):
+        """
+        Restaura séries, alarmes e MUs do último snapshot (arquivos mapeados em memória)
+        """
+        inicio = time.perf_counter()
+        carregado = snapshot.carregar(diretorio)
+        if carregado is None:
+            return
+        meta, arrays = carregado
+        for id_, arr in arrays.items():
+            restaurado = snapshot.desempacotar_mu(arr, meta["medidas"], meta["fases"])
             self.series[id_] = {
-                "tensao": { "A": [], "B": [], "C": [] },
-                "corrente": { "A": [], "B": [], "C": [] },
-                "potRealW": { "A": [], "B": [], "C": [] },
-                "angTensao": { "A": [], "B": [], "C": [] },
-                "potApaVA": { "A": [], "B": [], "C": [] },
-                "potReatVAr": { "A": [], "B": [], "C": [] },
-                "potRealW": { "A": [], "B": [], "C": [] },
-                "fatorP": { "A": [], "B": [], "C": [] },
-                "freq": { "A": [], "B": [], "C": [] },
+                medida: {
+                    fase: restaurado[medida][fase] if fase in restaurado.get(medida, {}) else SerieTemporal()
+                    for fase in FASES
+                }
+                for medida in MEDIDAS
             }
+            self._registrar_mu(id_)
+        self.alarms = meta["alarmes"]
+        log.info("[SNAPSHOT] estado restaurado de %s em %.3fs (%d MUs, %d alarmes).", diretorio, time.perf_counter() - inicio, len(arrays), len(self.alarms))
+
+        self._redraw_plot()
+        self._redraw_alarms()
+
+    def add_medidas(self, id_: str, ts: str, medidas: [MedidasEletricas]):
+        """
+        Método auxiliar para adicionar novas medidas em self.series.
+        Fases desconhecidas e valores ausentes/inválidos são ignorados.
+        """
+        t = datetime.fromisoformat(ts).timestamp()
+        if id_ not in self.series:
+            self.series[id_] = {medida: {fase: SerieTemporal() for fase in FASES} for medida in MEDIDAS}
+        series_mu = self.series[id_]
         for medida in medidas:
-            medida = MedidasEletricas(**medida)
-            self.series[id_]["tensao"][medida.fase].append((ts, medida.tensao))
-            self.series[id_]["corrente"][medida.fase].append((ts, medida.corrente))
-            self.series[id_]["potRealW"][medida.fase].append((ts, medida.potRealW))
-            self.series[id_]["angTensao"][medida.fase].append((ts, medida.angTensao))
-            self.series[id_]["potApaVA"][medida.fase].append((ts, medida.potApaVA))
-            self.series[id_]["potReatVAr"][medida.fase].append((ts, medida.potReatVAr))
-            self.series[id_]["potRealW"][medida.fase].append((ts, medida.potRealW))
-            self.series[id_]["fatorP"][medida.fase].append((ts, medida.fatorP))
-            self.series[id_]["freq"][medida.fase].append((ts, medida.freq))
+            fase = medida.get("fase")
+            if fase not in FASES:
+                continue
+            for nome in MEDIDAS:
+                try:
+                    valor = float(medida[nome])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                series_mu[nome][fase].append(t, valor)
+
+# ----------------------------
+# GUI em processo separado
+# ----------------------------
+def executar_gui(nome_anel, snapshot_dir=None):
+    """
+    Ponto de entrada do processo da GUI (--gui-processo).
+    Consome os itens do anel em memória compartilhada escrito pelo processo do pipeline.
+    """
+    leitor = AnelLeitor(nome_anel)
+    shutdown_event = threading.Event()
+    try:
+        root = tk.Tk()
+        app = Modulo3GUI(root, leitor, shutdown_event, snapshot_dir)
+        root.mainloop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        leitor.fechar()
+
+
+def supervisionar_gui(nome_anel, shutdown_event, snapshot_dir=None):
+    """
+    Executa a GUI em um processo separado e a reinicia se ela terminar com erro.
+    Retorna quando o usuário fecha a janela ou quando shutdown_event é setado.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    while not shutdown_event.is_set():
+        processo = ctx.Process(target=executar_gui, args=(nome_anel, snapshot_dir), daemon=True, name="gui")
+        processo.start()
+        log.info("[GUI] processo iniciado (pid=%s).", processo.pid)
+        while processo.is_alive() and not shutdown_event.is_set():
+            processo.join(timeout=0.5)
+
+        if processo.is_alive():
+            processo.terminate()
+            processo.join()
+            return
+        if processo.exitcode == 0:
+            log.info("[GUI] encerrada pelo usuário.")
+            return
+        log.warning("[GUI] processo terminou com código %s. Reiniciando em %.1fs...", processo.exitcode, GUI_REINICIO_S)
+        shutdown_event.wait(GUI_REINICIO_S)
 
 # ----------------------------
 # Main
 # ----------------------------
+def argumento_amostragem(valor: str) -> tuple[str, int]:
+    """
+    Converte "URI=N" da opção --amostrar, exigindo N >= 1
+    """
+    uri, _, n = valor.rpartition("=")
+    if not uri or not n.isdigit() or int(n) < 1:
+        raise argparse.ArgumentTypeError(f'esperado URI=N com N inteiro >= 1, recebido "{valor}"')
+    return uri, int(n)
+
 def main():
+    parser = argparse.ArgumentParser(description="Módulo 3 - Monitoramento")
+    parser.add_argument("--gui-processo", action="store_true", help="executa a GUI em um processo separado, alimentada por memória compartilhada")
+    parser.add_argument("--snapshot-dir", default=snapshot.SNAPSHOT_DIR, help="diretório dos snapshots do estado da GUI e do pipeline")
+    parser.add_argument("--sem-snapshot", action="store_true", help="não restaura nem grava snapshots")
+    parser.add_argument("--mus", type=lambda v: {int(x) for x in v.split(",")}, default=None, help="idMUs monitorados, separados por vírgula (padrão: todos)")
+    parser.add_argument("--ieds", type=lambda v: set(v.split(",")), default=None, help="idIEDs monitorados, separados por vírgula (padrão: todos)")
+    parser.add_argument("--descartar", type=lambda v: set(v.split(",")), default=set(), help="URIs descartados na recepção, separados por vírgula")
+    parser.add_argument("--amostrar", type=argumento_amostragem, action="append", default=[], metavar="URI=N", help="mantém 1 a cada N pacotes do URI, N >= 1 (pode repetir)")
+    parser.add_argument("--adiar", type=lambda v: set(filter(None, v.split(","))), default={"99/1"}, help="URIs com decodificação JSON adiada para o processamento (padrão: 99/1)")
+    parser.add_argument("--api", default=None, metavar="ENDERECO", help='habilita a API de streaming em "unix:/caminho" ou "host:porta"')
+    args = parser.parse_args()
+    snapshot_dir = None if args.sem_snapshot else args.snapshot_dir
+    amostragem = dict(args.amostrar)
+    filtro = FiltroIngestao(args.mus, args.ieds, args.descartar, amostragem, args.adiar)
+
     log.info("Módulo 3 iniciando (GUI)")
 
     # inicializa as variáveis de controle
     shutdown_event = threading.Event()
-    seq_counter = itertools.count(1)
 
     # inicializa as filas
     priority_queue = queue.PriorityQueue()
-    queue_gui = queue.Queue()
     queue_db = queue.Queue()
 
+    # inicializa os estágios de processamento
+    detector = DetectorAnomalias(MEDIDAS, FASES)
+    motor_cep = MotorCEP()
+    estagios = [
+        functools.partial(detectar_anomalias, detector),
+        functools.partial(correlacionar_eventos, motor_cep),
+    ]
+
+    # reinício a quente do pipeline: contador de sequência, detector e janelas CEP
+    persistir = None
+    if snapshot_dir:
+        seq_counter = restaurar_pipeline(snapshot_dir, detector, motor_cep)
+        gravador_pipeline = snapshot.GravadorSnapshot(snapshot_dir, snapshot.PIPELINE_ARQUIVO)
+        persistir = functools.partial(persistir_pipeline, gravador_pipeline, seq_counter, detector, motor_cep)
+    else:
+        seq_counter = itertools.count(1)
+
     # inicializa o socket UDP
     recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -537,21 +1029,40 @@ def main():
         log.exception("Falha bind socket: %s", e)
         return
 
+    # com --api os consumidores externos assinam os pacotes por um socket local
+    api = None
+    if args.api:
+        try:
+            api = ServidorStreaming(args.api, MEDIDAS, FASES)
+        except OSError as e:
+            log.exception("Falha ao abrir a API de streaming em %s: %s", args.api, e)
+            recv_sock.close()
+            return
+
+    # com --gui-processo a GUI consome um anel em memória compartilhada: uma GUI lenta ou
+    # travada nunca bloqueia o pipeline (itens excedentes são descartados). O anel é criado
+    # depois dos sockets para que os retornos antecipados acima não deixem o segmento para trás
+    queue_gui = AnelEscritor() if args.gui_processo else queue.Queue()
+
     # inicializa as threads
-    t_recv = threading.Thread(target=thread_recepcao, args=(recv_sock, priority_queue, shutdown_event, seq_counter), daemon=True, name="recv")
-    t_proc = threading.Thread(target=thread_processamento, args=(priority_queue, queue_gui, queue_db, shutdown_event), daemon=True, name="proc")
+    t_recv = threading.Thread(target=thread_recepcao, args=(recv_sock, priority_queue, shutdown_event, seq_counter, filtro), daemon=True, name="recv")
+    t_proc = threading.Thread(target=thread_processamento, args=(priority_queue, queue_gui, queue_db, shutdown_event, estagios, api, persistir), daemon=True, name="proc")
     t_db = threading.Thread(target=thread_armazenamento, args=(queue_db, shutdown_event), daemon=True, name="db")
 
     for t in (t_recv, t_proc, t_db):
         log.info("Iniciando thread %s", t.name)
         t.start()
-
-    # Inicia interface gráfica
-    root = tk.Tk()
-    app = Modulo3GUI(root, queue_gui, shutdown_event)
+    if api is not None:
+        api.iniciar(shutdown_event)
 
     try:
-        root.mainloop()
+        # Inicia interface gráfica
+        if args.gui_processo:
+            supervisionar_gui(queue_gui.nome, shutdown_event, snapshot_dir)
+        else:
+            root = tk.Tk()
+            app = Modulo3GUI(root, queue_gui, shutdown_event, snapshot_dir)
+            root.mainloop()
     except KeyboardInterrupt:
         log.info("KeyboardInterrupt recebido no mainloop")
     finally:
@@ -562,6 +1073,12 @@ def main():
             recv_sock.close()
         except Exception:
             pass
+        # aguarda o processamento terminar (e gravar o estado final do pipeline)
+        t_proc.join(timeout=2.0)
+        if args.gui_processo:
+            queue_gui.fechar()
+        if api is not None:
+            api.thread.join(timeout=1.0)
         log.info("Finalizado.")
 
 if __name__ == "__main__":
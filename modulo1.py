@@ -4,6 +4,7 @@ import json
 import random
 import time
 from datetime import datetime, timezone
+import emissor_rapido
 
 IP = "127.255.255.255"
 PORT = 3333
@@ -96,5 +97,37 @@ def main():
         print("\nSimulação encerrada.")
         sock.close()
 
+def main_alta_taxa(args):
+    """
+    Envia 99/1 e 99/2 a partir de templates pré-codificados, variando numPct, timestamp e tensão
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+    templates = []
+    for _ in range(emissor_rapido.TAMANHO_POOL):
+        idMU = random.randint(0,11)
+        idAtivo = f"IED_{random.choice(string.ascii_uppercase)}{random.randint(0, 11)}"
+        if random.random() < 0.9:
+            pacote = gerar_pacote_99_1(idMU, idAtivo, 0)
+        else:
+            pacote = gerar_pacote_99_2(idMU, idAtivo, 0)
+        pacote["numPct"] = emissor_rapido.CAMPO_NUMPCT
+        pacote["timestamp"] = emissor_rapido.CAMPO_TIMESTAMP
+        for medida in pacote["medidas"]:
+            medida["tensao"] = emissor_rapido.campo(f"tensao{medida['fase']}")
+        templates.append(emissor_rapido.TemplatePacote(pacote))
+
+    valores = {
+        f"tensao{fase}": emissor_rapido.formatar_valores(random.uniform(218, 222) for _ in range(1024))
+        for fase in ("A", "B", "C")
+    }
+    emissor_rapido.emitir(sock, (IP, PORT), templates, valores, args.taxa, args.rajada, args.duracao)
+    sock.close()
+
 if __name__ == "__main__":
-    main()
+    args = emissor_rapido.argumentos("Simulador de Merge Units (99/1 e 99/2)")
+    if args.alta_taxa:
+        main_alta_taxa(args)
+    else:
+        main()
@@ -4,6 +4,7 @@ import json
 import random
 import time
 from datetime import datetime, timezone
+import emissor_rapido
 
 IP = "127.255.255.255"
 PORT = 3333
@@ -86,5 +87,35 @@ def main():
         print("\nSimulação encerrada.")
         sock.close()
 
+def main_alta_taxa(args):
+    """
+    Envia pares 200/1 e 200/2 a partir de templates pré-codificados, variando timestamp e corrente
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+    templates = []
+    for _ in range(emissor_rapido.TAMANHO_POOL // 2):
+        idIED = f"IED_{random.choice(string.ascii_uppercase)}{random.randint(0,11)}"
+        funcao = random.choice(["50", "51"])
+        evento_inicio = gerar_evento_inicio(idIED, funcao, 0)
+        evento_inicio["timestamp"] = emissor_rapido.CAMPO_TIMESTAMP
+        evento_inicio["medidas"]["corrente"] = emissor_rapido.campo(f"corrente{funcao}")
+        evento_fim = gerar_evento_fim(idIED, funcao, 0)
+        evento_fim["timestamp"] = emissor_rapido.CAMPO_TIMESTAMP
+        templates.append(emissor_rapido.TemplatePacote(evento_inicio))
+        templates.append(emissor_rapido.TemplatePacote(evento_fim))
+
+    valores = {
+        "corrente50": emissor_rapido.formatar_valores(random.uniform(40, 80) for _ in range(1024)),
+        "corrente51": emissor_rapido.formatar_valores(random.uniform(20, 35) for _ in range(1024)),
+    }
+    emissor_rapido.emitir(sock, (IP, PORT), templates, valores, args.taxa, args.rajada, args.duracao)
+    sock.close()
+
 if __name__ == "__main__":
-    main()
+    args = emissor_rapido.argumentos("Simulador de IEDs de proteção (200/1 e 200/2)")
+    if args.alta_taxa:
+        main_alta_taxa(args)
+    else:
+        main()
@@ -4,6 +4,7 @@ import json
 import random
 import time
 from datetime import datetime, timezone
+import emissor_rapido
 
 IP = "127.255.255.255"
 PORT = 3333
@@ -40,5 +41,30 @@ def main():
         print("\nSimulação encerrada.")
         sock.close()
 
+def main_alta_taxa(args):
+    """
+    Envia 400/1 a partir de templates pré-codificados, variando timestamp e nroEventosAcumulados
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+    templates = []
+    for _ in range(emissor_rapido.TAMANHO_POOL):
+        idIED = f"IED_{random.choice(string.ascii_uppercase)}{random.randint(0,11)}"
+        pacote = gerar_evento_acumulado(idIED, 0)
+        pacote["timestamp"] = emissor_rapido.CAMPO_TIMESTAMP
+        pacote["nroEventosAcumulados"] = emissor_rapido.campo("nroEventosAcumulados")
+        templates.append(emissor_rapido.TemplatePacote(pacote, {"nroEventosAcumulados": 2}))
+
+    valores = {
+        "nroEventosAcumulados": [b"%2d" % random.randint(1, 50) for _ in range(1024)],
+    }
+    emissor_rapido.emitir(sock, (IP, PORT), templates, valores, args.taxa, args.rajada, args.duracao)
+    sock.close()
+
 if __name__ == "__main__":
-    main()
+    args = emissor_rapido.argumentos("Simulador de eventos acumulados (400/1)")
+    if args.alta_taxa:
+        main_alta_taxa(args)
+    else:
+        main()
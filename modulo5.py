@@ -3,14 +3,12 @@ import json
 import random
 import time
 from datetime import datetime, timezone
+import emissor_rapido
 
 # Configurações de rede
 BROADCAST_IP = "127.255.255.255"
 PORT = 3333
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-
 # Função para gerar evento CEP
 def gerar_evento_cep(idCidade, numPct):
     # número de consumidores afetados (pode chegar a milhares)
@@ -32,25 +30,50 @@ def gerar_evento_cep(idCidade, numPct):
         "descricao": descricao
     }
 
-# Simulação
 cidades = ["Uberlandia", "Araguari", "Patos de Minas", "Ituiutaba"]
-numPct = 0
 
-try:
-    while True:
-        numPct += 1
-        cidade = random.choice(cidades)
+def main():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
-        pacote = gerar_evento_cep(cidade, numPct)
-        mensagem = json.dumps(pacote).encode("utf-8")
+    numPct = 0
+    try:
+        while True:
+            numPct += 1
+            cidade = random.choice(cidades)
+    
+            pacote = gerar_evento_cep(cidade, numPct)
+            mensagem = json.dumps(pacote).encode("utf-8")
+    
+            sock.sendto(mensagem, (BROADCAST_IP, PORT))
+            print(f"Enviado CEP/Alarm: {pacote['descricao']} ({pacote['nroEventosAssociados']} eventos) - numPct={numPct}")
+    
+            # CEP gera alarmes mais esporádicos (a cada 5–15 segundos)
+            time.sleep(random.uniform(5, 15))
+    
+    except KeyboardInterrupt:
+        print("\nSimulação encerrada.")
+        sock.close()
 
-        sock.sendto(mensagem, (BROADCAST_IP, PORT))
-        print(f"Enviado CEP/Alarm: {pacote['descricao']} ({pacote['nroEventosAssociados']} eventos) - numPct={numPct}")
+def main_alta_taxa(args):
+    """
+    Envia CEP/Alarm a partir de templates pré-codificados, variando o timestamp
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
-        # CEP gera alarmes mais esporádicos (a cada 5–15 segundos)
-        time.sleep(random.uniform(5, 15))
+    templates = []
+    for _ in range(emissor_rapido.TAMANHO_POOL):
+        pacote = gerar_evento_cep(random.choice(cidades), 0)
+        pacote["timestamp"] = emissor_rapido.CAMPO_TIMESTAMP
+        templates.append(emissor_rapido.TemplatePacote(pacote))
 
-except KeyboardInterrupt:
-    print("\nSimulação encerrada.")
+    emissor_rapido.emitir(sock, (BROADCAST_IP, PORT), templates, None, args.taxa, args.rajada, args.duracao)
     sock.close()
 
+if __name__ == "__main__":
+    args = emissor_rapido.argumentos("Simulador de alarmes CEP (CEP/Alarm)")
+    if args.alta_taxa:
+        main_alta_taxa(args)
+    else:
+        main()
@@ -0,0 +1,88 @@
+"""
+Séries históricas em memória.
+
+- SerieTemporal: buffer circular de (timestamp, valor) com capacidade fixa, armazenado em arrays NumPy
+- reduzir: downsampling min/max para limitar o número de pontos desenhados por série
+"""
+
+import numpy as np
+
+# ----------------------------
+# Constantes
+# ----------------------------
+SERIE_CAPACIDADE = 3600     # nro máximo de pontos mantidos por série (memória limitada por MU)
+
+
+class SerieTemporal:
+    """
+    Buffer circular de pontos (t, y). t é o timestamp POSIX em segundos.
+    Quando cheio, o ponto mais antigo é sobrescrito.
+    """
+    __slots__ = ("t", "y", "inicio", "tamanho")
+
+    def __init__(self, capacidade: int = SERIE_CAPACIDADE):
+        self.t = np.empty(capacidade, dtype=np.float64)
+        self.y = np.empty(capacidade, dtype=np.float64)
+        self.inicio = 0
+        self.tamanho = 0
+
+    def __len__(self):
+        return self.tamanho
+
+    @property
+    def capacidade(self) -> int:
+        return self.t.shape[0]
+
+    def append(self, t: float, y: float):
+        """
+        Adiciona um ponto ao final da série
+        """
+        capacidade = self.t.shape[0]
+        if self.tamanho < capacidade:
+            i = self.inicio + self.tamanho
+            if i >= capacidade:
+                i -= capacidade
+            self.tamanho += 1
+        else:
+            i = self.inicio
+            self.inicio = i + 1 if i + 1 < capacidade else 0
+        self.t[i] = t
+        self.y[i] = y
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna (t, y) em ordem cronológica. Sem cópia enquanto o buffer não deu a volta.
+        """
+        fim = self.inicio + self.tamanho
+        if fim <= self.t.shape[0]:
+            return self.t[self.inicio:fim], self.y[self.inicio:fim]
+        fim -= self.t.shape[0]
+        return (
+            np.concatenate((self.t[self.inicio:], self.t[:fim])),
+            np.concatenate((self.y[self.inicio:], self.y[:fim])),
+        )
+
+
+def reduzir(t: np.ndarray, y: np.ndarray, max_pontos: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Downsampling min/max: divide a série em max_pontos//2 blocos e mantém o menor e o maior
+    valor de cada bloco, preservando picos (importante para enxergar discrepâncias).
+    """
+    n = t.shape[0]
+    if n <= max_pontos:
+        return t, y
+    blocos = max(max_pontos // 2, 1)
+    k = n // blocos
+    n_util = blocos * k
+    # os pontos que sobram no início são descartados para manter o final (mais recente) da série
+    tb = t[n - n_util:].reshape(blocos, k)
+    yb = y[n - n_util:].reshape(blocos, k)
+    idx_min = yb.argmin(axis=1)
+    idx_max = yb.argmax(axis=1)
+    # mantém a ordem temporal dentro de cada bloco
+    primeiro = np.minimum(idx_min, idx_max)
+    segundo = np.maximum(idx_min, idx_max)
+    linhas = np.arange(blocos)
+    t_out = np.column_stack((tb[linhas, primeiro], tb[linhas, segundo])).ravel()
+    y_out = np.column_stack((yb[linhas, primeiro], yb[linhas, segundo])).ravel()
+    return t_out, y_out
@@ -0,0 +1,173 @@
+"""
+Snapshots do estado em memória da GUI para reinício a quente.
+
+Formato (diretório de snapshot):
+- mu_<id>.npy: séries de uma MU em um único array float64 de forma (1 + nro de medidas, nro de fases, N).
+  A linha 0 contém os timestamps (compartilhados por todas as medidas de uma fase) e as demais os
+  valores, em ordem cronológica. Posições não usadas são NaN, então o arquivo é autodescritivo.
+- estado.json: alarmes e registro de MUs.
+- pipeline.json: estado do pipeline de processamento (contador de sequência, estatísticas EWMA do
+  detector de anomalias e janelas CEP), gravado pela thread de processamento.
+
+Cada arquivo é escrito em um temporário e renomeado (os.replace), então um snapshot interrompido
+nunca deixa um arquivo pela metade. Os snapshots são incrementais: só as MUs que receberam dados
+desde o último snapshot são regravadas. A carga usa np.load com mmap_mode, sem ler os arquivos
+inteiros antes de copiar para os buffers.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+
+from series import SerieTemporal
+
+# ----------------------------
+# Constantes
+# ----------------------------
+SNAPSHOT_DIR = "estado"
+SNAPSHOT_INTERVALO_S = 10.0
+META_ARQUIVO = "estado.json"
+PIPELINE_ARQUIVO = "pipeline.json"
+VERSAO = 1
+
+log = logging.getLogger("modulo3_gui")
+
+
+def _escrever_atomico(caminho, escrever):
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        escrever(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def _arquivo_mu(diretorio, id_):
+    return os.path.join(diretorio, f"{id_}.npy".lower())
+
+
+def empacotar_mu(series_mu: dict, medidas, fases) -> np.ndarray:
+    """
+    Copia as séries de uma MU (medida -> fase -> SerieTemporal) para um único array
+    """
+    n = max(len(series_mu[medidas[0]][fase]) for fase in fases)
+    arr = np.full((1 + len(medidas), len(fases), n), np.nan)
+    for j, fase in enumerate(fases):
+        # todas as medidas de uma fase recebem pontos juntos, então compartilham os timestamps
+        t, _ = series_mu[medidas[0]][fase].arrays()
+        arr[0, j, :t.shape[0]] = t
+        for i, medida in enumerate(medidas):
+            _, y = series_mu[medida][fase].arrays()
+            arr[1 + i, j, :y.shape[0]] = y
+    return arr
+
+
+def desempacotar_mu(arr: np.ndarray, medidas, fases) -> dict:
+    """
+    Reconstrói as séries de uma MU a partir do array (possivelmente mapeado em memória)
+    """
+    series_mu = {medida: {fase: SerieTemporal() for fase in fases} for medida in medidas}
+    for j, fase in enumerate(fases):
+        t = arr[0, j]
+        n = int(np.count_nonzero(~np.isnan(t)))
+        for i, medida in enumerate(medidas):
+            serie = series_mu[medida][fase]
+            # mantém os pontos mais recentes se o snapshot tiver mais pontos que a capacidade atual
+            m = min(n, serie.capacidade)
+            serie.t[:m] = t[n - m:n]
+            serie.y[:m] = arr[1 + i, j, n - m:n]
+            serie.tamanho = m
+    return series_mu
+
+
+class GravadorSnapshot:
+    """
+    Grava snapshots em uma thread própria para não bloquear a GUI (ou o pipeline).
+    O dono do estado prepara as cópias dos dados e chama enviar(); se uma gravação ainda estiver
+    em andamento o envio é recusado e o dono tenta de novo no próximo intervalo.
+    """
+    def __init__(self, diretorio=SNAPSHOT_DIR, meta_arquivo=META_ARQUIVO):
+        self.diretorio = diretorio
+        self.meta_arquivo = meta_arquivo
+        os.makedirs(diretorio, exist_ok=True)
+        self.pendente = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self._executar, daemon=True, name="snapshot")
+        self.thread.start()
+
+    def enviar(self, arrays: dict, meta: dict) -> bool:
+        try:
+            self.pendente.put_nowait((arrays, meta))
+            return True
+        except queue.Full:
+            return False
+
+    def gravar(self, arrays: dict, meta: dict):
+        """
+        Grava os arrays das MUs alteradas e depois os metadados (síncrono)
+        """
+        for id_, arr in arrays.items():
+            _escrever_atomico(_arquivo_mu(self.diretorio, id_), lambda f: np.save(f, arr))
+        meta = dict(meta, versao=VERSAO)
+        dados = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+        _escrever_atomico(os.path.join(self.diretorio, self.meta_arquivo), lambda f: f.write(dados))
+
+    def _executar(self):
+        while True:
+            arrays, meta = self.pendente.get()
+            try:
+                self.gravar(arrays, meta)
+                log.debug("[SNAPSHOT] gravado (%d MUs alteradas).", len(arrays))
+            except Exception:
+                log.exception("[SNAPSHOT] Falha ao gravar snapshot")
+            self.pendente.task_done()
+
+    def aguardar(self):
+        self.pendente.join()
+
+
+def carregar(diretorio=SNAPSHOT_DIR):
+    """
+    Carrega o snapshot. Retorna (meta, {id_: array mapeado em memória}) ou None se não houver
+    snapshot válido.
+    """
+    caminho = os.path.join(diretorio, META_ARQUIVO)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, "rb") as f:
+            meta = json.loads(f.read())
+        if meta.get("versao") != VERSAO:
+            log.warning("[SNAPSHOT] versão %s incompatível. Ignorando snapshot...", meta.get("versao"))
+            return None
+        arrays = {}
+        for id_ in meta["mus"]:
+            arquivo = _arquivo_mu(diretorio, id_)
+            if os.path.exists(arquivo):
+                arrays[id_] = np.load(arquivo, mmap_mode="r")
+        return meta, arrays
+    except Exception:
+        log.exception("[SNAPSHOT] Snapshot inválido em %s. Ignorando...", diretorio)
+        return None
+
+
+def carregar_pipeline(diretorio=SNAPSHOT_DIR):
+    """
+    Carrega o estado do pipeline (pipeline.json) ou None se não houver estado válido
+    """
+    caminho = os.path.join(diretorio, PIPELINE_ARQUIVO)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, "rb") as f:
+            estado = json.loads(f.read())
+        if estado.get("versao") != VERSAO:
+            log.warning("[SNAPSHOT] versão %s incompatível. Ignorando estado do pipeline...", estado.get("versao"))
+            return None
+        return estado
+    except Exception:
+        log.exception("[SNAPSHOT] Estado do pipeline inválido em %s. Ignorando...", diretorio)
+        return None